@@ -0,0 +1,142 @@
+"""
+Title: MBiol Project Flight Analysis
+Author: Ambrose Hlustik-Smith
+Description: Bootstrap confidence intervals and permutation tests of exit choice per trial and per experiment set
+"""
+# Generic libraries
+# =================
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import csv
+import os
+import sys
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Custom objects
+# ==============
+from objects.Config import ConfigError, load_config
+from objects.DataReader import data_files
+from objects.FlightStatistics import count_choices, experiment_sets, trial_task, set_task
+from objects.TrialSet import TrialDefinitionError, load_trial_set
+
+
+def parse_args():
+    """Reads the command line options
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-path", type=Path, default=None, help="Folder of DataWriter csv files (default data_path from the .env file)")
+    parser.add_argument("--trials-path", type=Path, default=None, help="Trial definition file (default trials_path from the .env file)")
+    parser.add_argument("--env", type=Path, default=Path(".env"), help="The .env file the default paths and timeouts are read from (default .env)")
+    parser.add_argument("--crossing-timeout", type=int, default=None, help="Entrance gate timeout in ms used to pair crossings (default the controller's entrance timeout)")
+    parser.add_argument("--exit-timeout", type=int, default=None, help="Exit gate timeout in ms (default the controller's exit timeout)")
+    parser.add_argument("--resamples", type=int, default=100000, help="Bootstrap and permutation resamples per test (default 100000)")
+    parser.add_argument("--confidence", type=float, default=0.95, help="Confidence level of the intervals (default 0.95)")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the resampling, results are reproducible for a seed (default 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default all cores)")
+    parser.add_argument("--output", type=Path, default=None, help="Optional csv file to save the results to")
+
+    return parser.parse_args()
+
+
+def main():
+    """Counts the flights in every data file and runs the resampling tests in a process pool
+    """
+
+    args = parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    import numpy as np
+
+    # Flights are paired with the controller's timeouts unless they are given, without a .env the defaults are used
+    try:
+        config = load_config(args.env)
+    except ConfigError as config_error:
+        logging.warning("Current config not used: {}".format(config_error))
+        config = None
+
+    data_path = args.data_path or (config.data_path if config else Path("data"))
+    trials_path = args.trials_path or (config.trials_path if config else Path("trials.toml"))
+    entrance_ms = args.crossing_timeout or (config.entrance_timeout if config else 1500)
+    exit_ms = args.exit_timeout or (config.exit_timeout if config else entrance_ms)
+
+    try:
+        trial_set = load_trial_set(trials_path)
+    except TrialDefinitionError as trial_error:
+        logging.warning("{}. Please check the trial file".format(trial_error))
+        sys.exit(1)
+    files = data_files(data_path)
+    if not files:
+        logging.warning("No data files found in {}".format(data_path))
+        return
+    entrance_timeout = entrance_ms / 1000
+    exit_timeout = exit_ms / 1000
+    logging.info("Pairing crossings with a {} ms entrance and {} ms exit timeout".format(entrance_ms, exit_ms))
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        # One file per task, the per trial counts are summed in file order
+        counts = {}
+        for file_counts in pool.map(count_choices, files, [entrance_timeout]*len(files), [exit_timeout]*len(files)):
+            for trial_id, (left, right) in file_counts.items():
+                trial_counts = counts.setdefault(trial_id, [0, 0])
+                trial_counts[0] += left
+                trial_counts[1] += right
+
+        logging.info("Counted {flights} flights from {files} files".format(
+            flights=sum(map(sum, counts.values())),
+            files=len(files)
+        ))
+
+        unknown_trials = set(counts) - set(trial_set.trials)
+        if unknown_trials:
+            logging.warning("Flights recorded in trials missing from the trial file: {}".format(sorted(unknown_trials)))
+
+        # Each test gets its own child seed so results do not depend on which worker runs it
+        tasks = []
+        for trial_id in sorted(trial_set.trials):
+            left, right = counts.get(trial_id, [0, 0])
+            tasks.append((trial_task, "Trial {}".format(trial_id), left, right))
+        for set_name, cue_trials in experiment_sets(trial_set.trials).items():
+            cue_left = [sum(counts.get(trial_id, [0, 0])[side] for trial_id in cue_trials["left"]) for side in (0, 1)]
+            cue_right = [sum(counts.get(trial_id, [0, 0])[side] for trial_id in cue_trials["right"]) for side in (0, 1)]
+            tasks.append((set_task, set_name.capitalize(), cue_left, cue_right))
+
+        seeds = np.random.SeedSequence(args.seed).spawn(len(tasks))
+        futures = [
+            pool.submit(task, label, first, second, args.resamples, seed, args.confidence)
+            for (task, label, first, second), seed in zip(tasks, seeds)
+        ]
+        results = [future.result() for future in futures]
+
+    # Results table
+    # =============
+    print("{:<26} {:>8} {:>10} {:>20} {:>10}".format("Test", "Flights", "Estimate", "CI", "p"))
+    for result in results:
+        estimate = result.get("p_left", result.get("p_towards_cue"))
+        if estimate is None:
+            print("{:<26} {:>8} {:>10}".format(result["label"], result["flights"], "no data"))
+            continue
+        print("{:<26} {:>8} {:>10.3f} {:>20} {:>10.3g}".format(
+            result["label"],
+            result["flights"],
+            estimate,
+            "[{:.3f}, {:.3f}]".format(result["ci_low"], result["ci_high"]),
+            result["p_value"]
+        ))
+    print("Trial estimates are the proportion of left exits, set estimates the proportion of exits towards the cue")
+
+    if args.output:
+        fieldnames = ["label", "flights", "left", "right", "towards_cue", "p_left", "p_towards_cue", "ci_low", "ci_high", "p_value"]
+        with args.output.open("w", newline="") as output_file:
+            writer = csv.DictWriter(output_file, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(results)
+        logging.info("Results saved to {}".format(args.output))
+
+
+if __name__ == "__main__":
+    main()
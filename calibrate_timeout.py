@@ -0,0 +1,108 @@
+"""
+Title: MBiol Project Crossing Timeout Calibration
+Author: Ambrose Hlustik-Smith
+Description: Recommends per gate crossing timeouts from the flight times and bird spacing in past data
+"""
+# Generic libraries
+# =================
+from statistics import median
+from pathlib import Path
+import argparse
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Custom objects
+# ==============
+from objects.Config import ConfigError, load_config
+from objects.DataReader import data_files, iter_events
+from objects.TimeoutCalibration import TimeoutCalibration
+
+
+def parse_args():
+    """Reads the command line options
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-path", type=Path, default=None, help="Folder of DataWriter csv files (default data_path from the .env file)")
+    parser.add_argument("--env", type=Path, default=Path(".env"), help="The .env file the current timeouts are read from (default .env)")
+    parser.add_argument("--target", type=float, default=0.01, help="Acceptable rate of false resets and merged flights (default 0.01)")
+    parser.add_argument("--max-interval", type=float, default=10, help="Longest gap in seconds considered part of a flight (default 10)")
+    parser.add_argument("--bounce-ms", type=float, default=50, help="Exit gaps shorter than this are one bird bouncing (default 50)")
+    parser.add_argument("--write", action="store_true", help="Saves the recommended timeouts to the .env file")
+
+    return parser.parse_args()
+
+
+def main():
+    """Streams the data files and reports the recommended timeout for each gate
+    """
+
+    args = parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    # The current timeouts are only needed for comparison, so a missing .env is not an error
+    try:
+        config = load_config(args.env)
+    except ConfigError as config_error:
+        logging.warning("Current config not used: {}".format(config_error))
+        config = None
+
+    data_path = args.data_path or (config.data_path if config else Path("data"))
+    files = data_files(data_path)
+    if not files:
+        logging.warning("No data files found in {}".format(data_path))
+        return
+
+    calibration = TimeoutCalibration(args.max_interval, args.bounce_ms / 1000)
+    for data_file in files:
+        calibration.add_events(iter_events(data_file))
+    calibration.sort()
+
+    logging.info(
+        "Read {files} files: {entrance_exit} entrance to exit, {exit_entrance} exit to entrance and {exit_exit} exit to exit intervals".format(
+            files=len(files),
+            entrance_exit=len(calibration.entrance_exit),
+            exit_entrance=len(calibration.exit_entrance),
+            exit_exit=len(calibration.exit_exit)
+        )
+    )
+
+    # The entrance timeout must cover entrance first flights and the exit timeout exit first flights
+    gates = {
+        "entrance": ("entrance_crossing_timeout", calibration.entrance_exit, config.entrance_timeout if config else None),
+        "exit": ("exit_crossing_timeout", calibration.exit_entrance, config.exit_timeout if config else None)
+    }
+
+    recommended = {}
+    for gate, (config_key, flight_times, current_ms) in gates.items():
+        recommendation = calibration.recommend(flight_times, args.target)
+        if recommendation is None:
+            logging.warning("Too few flights timed from the {} gate to recommend a timeout".format(gate))
+            continue
+
+        print("{} gate: median flight time {:.0f} ms".format(gate.capitalize(), median(flight_times)*1000))
+        if current_ms:
+            false_resets, merged = calibration.rates(calibration.fit(flight_times), current_ms / 1000)
+            print("    current     {:>6} ms: {:6.2%} false resets, {:6.2%} merged flights".format(current_ms, false_resets, merged))
+        print("    recommended {:>6.0f} ms: {:6.2%} false resets, {:6.2%} merged flights".format(
+            recommendation["timeout"]*1000,
+            recommendation["false_reset_rate"],
+            recommendation["merged_rate"]
+        ))
+        recommended[config_key] = round(recommendation["timeout"]*1000)
+
+    if args.write and recommended:
+        if not args.env.exists():
+            logging.warning("{} does not exist, timeouts not saved".format(args.env))
+            return
+
+        from dotenv import set_key
+        for config_key, timeout_ms in recommended.items():
+            set_key(args.env, config_key, str(timeout_ms), quote_mode="never")
+        logging.info("Saved {} to {}".format(recommended, args.env))
+
+
+if __name__ == "__main__":
+    main()
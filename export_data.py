@@ -0,0 +1,82 @@
+"""
+Title: MBiol Project Data Export
+Author: Ambrose Hlustik-Smith
+Description: Copies the rows appended to the day data files since the last run into a SQLite database
+"""
+# Generic libraries
+# =================
+from pathlib import Path
+from time import sleep
+import argparse
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Custom objects
+# ==============
+from objects.Config import ConfigError, load_config
+from objects.DataExporter import DataExporter
+from objects.DataReader import data_files
+
+
+def parse_args():
+    """Reads the command line options
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-path", type=Path, default=None, help="Folder of DataWriter csv files (default data_path from the .env file)")
+    parser.add_argument("--env", type=Path, default=Path(".env"), help="The .env file the default data path is read from (default .env)")
+    parser.add_argument("--database", type=Path, default=Path("export/events.sqlite"), help="SQLite database to export to (default export/events.sqlite)")
+    parser.add_argument("--interval", type=float, default=None, help="Repeats the export every this many seconds until interrupted")
+
+    return parser.parse_args()
+
+
+def export(exporter:DataExporter, data_path:Path):
+    """Exports the new rows of every data file, including day files created since the last run
+
+    Args:
+        exporter (DataExporter): The open exporter
+        data_path (Path): Folder of DataWriter csv files
+    """
+
+    exported = 0
+    for data_file in data_files(data_path):
+        exported += exporter.export_file(data_file)
+
+    logging.info("Exported {} new rows".format(exported))
+
+
+def main():
+    """Runs the export once, or repeatedly with --interval
+    """
+
+    args = parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    # The data path is only needed from the .env file, so a missing .env is not an error
+    try:
+        config = load_config(args.env)
+    except ConfigError as config_error:
+        logging.warning("Current config not used: {}".format(config_error))
+        config = None
+
+    data_path = args.data_path or (config.data_path if config else Path("data"))
+    if not data_files(data_path):
+        logging.warning("No data files found in {}".format(data_path))
+
+    exporter = DataExporter(args.database)
+    try:
+        export(exporter, data_path)
+        while args.interval:
+            sleep(args.interval)
+            export(exporter, data_path)
+    except KeyboardInterrupt:
+        logging.info("Export stopped")
+    finally:
+        exporter.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,148 +5,162 @@ Description: The code controlling the mainloop of the electronics in my masters
 """
 # Generic libraries
 # =================
+# Heavy or hardware specific libraries (Tk, GPIO, dotenv, waiting) are imported on first use
+# so the controller can be imported by tools and tests without side effects
 import random
+import sys
 from pathlib import Path
-from time import strftime, localtime
+from time import strftime, localtime, perf_counter
 
-from waiting import wait, ANY
-
-# Environment variables setup
-# ===========================
-from dotenv import dotenv_values
+import logging
+logger = logging.getLogger(__name__)
 
-# Defaults of optional environment variables
-default_config = {
-    "DEBUG": "",
-    "data_path": "data",
-    "log_path": "logs",
-    "manual_collection": "false"
-}
+# Custom objects
+# ==============
+from objects.Config import Config, ConfigError, load_config
+from objects.DataWriter import DataWriter
+from objects.GateInput import open_gate_input
+from objects.Profiler import Profiler
+from objects.SessionState import SessionState
+from objects.SessionSummary import SessionSummary
+from objects.TrialSet import TrialSet, TrialDefinitionError, TRIAL_KEYS, load_trial_set
 
-# Merges the defaults with the file
-config = {
-    **default_config,
-    **dotenv_values(".env")
-}
 
+def setup_logging(config:Config) -> Path:
+    """Configures logging to the console and a log file named by the session start time
 
-# Checks mandatory config values are set
-try:
-    config["left_gate_pin"]
-    config["right_gate_pin"]
-    config["entrance_gate_pin"]
-    config["crossing_timeout"]
-except KeyError as missing_key:
-    assert False, "MANDATORY CONFIG VALUE {} NOT SET, EXITING".format(missing_key)
+    Args:
+        config (Config): The experiment config
 
+    Returns:
+        Path: The log file path without the suffix, other session output is saved next to it
+    """
 
-# Logging setup
-# =============
-import logging
-logger = logging.getLogger(__name__)
-# Checks the path exists
-Path(config["log_path"]).mkdir(parents=True, exist_ok=True)
-if "limitlogs" in config["DEBUG"].lower():
-    # Deletes all old log files leaving only latest
-    log_files = list(Path(config["log_path"]).glob("*.log"))
-    for log in log_files:
-        log.unlink()
-# Logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        # Saves log messages to file
-        logging.FileHandler(
-            Path("{path}/{filename}.log".format(
-                path=config["log_path"],
-                filename=strftime("%Y%m%d%H%M%S", localtime())
-                )
-            )
-        ),
-        # Output log messgaes to console
-        logging.StreamHandler()
-    ]
-)
-    
-# GPIO
-# ====
-# Attempts to import GPIO, but for laptop testing imports Mock.GPIO instead
-try:
-    import RPi.GPIO as GPIO # type: ignore
-except:
-    import Mock.GPIO as GPIO
-    logging.warning("Mock.GPIO used. This is probally due to laptop testing but if not this is a problem!")
+    # Checks the path exists
+    config.log_path.mkdir(parents=True, exist_ok=True)
+    if config.debug_flag("limitLogs"):
+        # Deletes all old log files leaving only latest, with the profiler output saved next to them
+        log_files = list(config.log_path.glob("*.log"))
+        for log in log_files:
+            for session_file in config.log_path.glob("{}.*".format(log.stem)):
+                session_file.unlink()
+
+    # Log files are named by session start, profiler output shares the same name
+    log_stem = config.log_path / strftime("%Y%m%d%H%M%S", localtime())
+
+    # Logging configuration
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        handlers=[
+            # Saves log messages to file
+            logging.FileHandler(log_stem.with_suffix(".log")),
+            # Output log messgaes to console
+            logging.StreamHandler()
+        ]
+    )
 
-# Custom objects
-# ==============
-from objects.DisplayScreen import DisplayScreen
-from objects.DataWriter import DataWriter
+    return log_stem
 
 
 class masters_Electronics:
     """Main class with control over the tunnel electronics
     """
 
-    def __init__(self, config):
+    def __init__(self, config:Config, log_stem:Path):
         """Calls the setup for all necessary objects
+
+        Args:
+            config (Config): The validated experiment config
+            log_stem (Path): The session log file path without the suffix
         """
 
+        # Tk is only imported once the application is created
+        from objects.DisplayScreen import DisplayScreen
+
         # Basic control variables
         # =======================
         self.config = config
+        self.log_stem = log_stem
 
         self.running = None
 
         self.change_obstacle_state = False
+        self.current_obstacle = None
+
+        # How often the trial file is checked for changes
+        self.TRIAL_WATCH_MS = 1000
+
+        # How often queued gate edges are processed
+        self.GATE_POLL_MS = 5
+        self.gate_input = None
 
         self.entrance_gate_crossed = False
         self.exit_gate_crossed = False
 
         # Debugging random reproducibility
         # ================================
-        if "setseed" in self.config["DEBUG"].lower(): random.seed(0)
+        if self.config.debug_flag("setSeed"): random.seed(0)
+
+        # Debugging profilers
+        # ===================
+        self.profiler = Profiler(self.config.debug, self.log_stem)
 
         # Experiment constants
         # ====================
         self.set_experiment_constants()
+        if self.running is False:
+            return
         logging.info("Set experiment constants")
 
         # Screen setup
         # ============
         self.display = DisplayScreen()
+        # Times every after callback and key binding when callback profiling is enabled
+        self.profiler.instrument(self.display)
+        self.profiler.instrument(self.display.canvas)
         logging.info("Set display screen")
 
         # Data writer setup
         # =================
-        self.data_writer = DataWriter(Path(self.config["data_path"]))
+        self.data_writer = DataWriter(self.config.data_path)
         logging.info("Set data writer")
 
+        # Running aggregates shown on the pause screen
+        self.session_summary = SessionSummary()
+
         # GPIO setup
         # ==========
-        # Only set up GPIO when not in manual mode
-        if "false" in self.config["manual_collection"]:
+        # Only set up GPIO when not in manual mode, the option is validated by the config
+        if self.config.manual_collection.lower() == "false":
             self.setup_gpio()
             self.setup_gpio_callbacks()
             logging.info("Set GPIO pins")
-        elif "mirror" in self.config["manual_collection"] or "facing" in self.config["manual_collection"]:
-            logging.warning("Manual Collection mode enabled- GPIO pins disabled")
         else:
-            logging.warning(
-                "INVALID ENV OPTION- manual_collection=\"{}\" is not recognised".format(self.config["manual_collection"])
-            )
-            self.exit_mainloop()
+            logging.warning("Manual Collection mode enabled- GPIO pins disabled")
 
         # Keybinds setup
         # ==============
         self.setup_keybinds()
         logging.info("Set keybinds")
 
+        # Session snapshots
+        # =================
+        self.session_state = SessionState(self.config.data_path / "session_state.bin")
+
         # Obstacle setup
         # ==============
         self.current_trial = self.EXPERIMENT_BLANK
-        self.change_obstacle()
-        logging.info("Set up of obstacle positioning")
+        if self.config.resume_session and self.resume_session():
+            logging.info("Resumed previous session")
+        else:
+            self.change_obstacle()
+            logging.info("Set up of obstacle positioning")
+
+        # Trial file reloading
+        # ====================
+        self.watch_trials()
+        logging.info("Watching trial file {}".format(self.config.trials_path))
 
         logging.info("Setup complete")
 
@@ -157,139 +171,175 @@ class masters_Electronics:
         """
 
         # A blank dictionary of a model experimental trial
-        self.EXPERIMENT_BLANK = {
-            "trial_id": None,
-            "left_bg": None,
-            "right_bg": None,
-            "left_fg": None,
-            "right_fg": None
-        }
+        self.EXPERIMENT_BLANK = dict.fromkeys(TRIAL_KEYS)
 
-        # List of dictionaries of valid obstacle positions
-        self.VALID_OBSTACLES = [
-            {
-                "left_fg": "white",
-                "right_fg": "white"
-            },
-            {
-                "left_fg": "black",
-                "right_fg": "black"
-            },
-            {
-                "left_fg": "white",
-                "right_fg": "black"
-            },
-            {
-                "left_fg": "black",
-                "right_fg": "white"
-            }
-        ]
+        # The trial set waiting to be swapped in at the next pause after the trial file changes
+        self.pending_trial_set = None
 
-        # List of the experimental trial setups
-        # Foreground and background use different colour terminology to avoid confusion in the logs, but this is otherwise unncessary
-        self.EXPERIMENTAL_TRIALS:dict = {
-            # Experiment Set 1 (see method notes)
-            1: {
-                "trial_id": 1,
-                "left_bg": "light",
-                "right_bg": "dark",
-                "left_fg": "white",
-                "right_fg": "white"
-            },
-            2: {
-                "trial_id": 2,
-                "left_bg": "dark",
-                "right_bg": "light",
-                "left_fg": "white",
-                "right_fg": "white"
-            },
-            3: {
-                "trial_id": 3,
-                "left_bg": "light",
-                "right_bg": "dark",
-                "left_fg": "black",
-                "right_fg": "black"
-            },
-            4: {
-                "trial_id": 4,
-                "left_bg": "dark",
-                "right_bg": "light",
-                "left_fg": "black",
-                "right_fg": "black"
-            },
-            # Experiment Set 2 (see method notes)
-            5: {
-                "trial_id": 5,
-                "left_bg": "light",
-                "right_bg": "light",
-                "left_fg": "white",
-                "right_fg": "black"
-            },
-            6: {
-                "trial_id": 6,
-                "left_bg": "dark",
-                "right_bg": "dark",
-                "left_fg": "white",
-                "right_fg": "black"
-            },
-            7: {
-                "trial_id": 7,
-                "left_bg": "light",
-                "right_bg": "light",
-                "left_fg": "black",
-                "right_fg": "white"
-            },
-            8: {
-                "trial_id": 8,
-                "left_bg": "dark",
-                "right_bg": "dark",
-                "left_fg": "black",
-                "right_fg": "white"
-            },
-        }
+        # Keeps the modification time of the loaded file so the watcher only reloads changed files.
+        # Read before loading so a save during the load is picked up by the watcher
+        try:
+            self.trial_file_stamp = self.config.trials_path.stat().st_mtime_ns
+        except OSError:
+            self.trial_file_stamp = None
 
-        # Error checking
-        # ==============
-        # As the above constants are set by the experimentor, check as far as possible they are valid
+        # The experimental trials and valid obstacle positions are set by the experimentor in the trial file
+        try:
+            trial_set = load_trial_set(self.config.trials_path)
+        except TrialDefinitionError as trial_error:
+            logging.warning("{}. Please check the trial file and relaunch".format(trial_error))
+
+            # Exits the program immedietly if the experimental trials is not formatted correctly
+            self.exit_mainloop()
+            return
+
+        self.set_trial_set(trial_set)
+
+        return
+
+    def set_trial_set(self, trial_set:TrialSet):
+        """Swaps the experimental trials and valid obstacles to a new compiled trial set
+
+        Args:
+            trial_set (TrialSet): The validated trial set
+        """
+
+        self.trial_set = trial_set
+        self.EXPERIMENTAL_TRIALS = trial_set.trials
+        self.VALID_OBSTACLES = trial_set.valid_obstacles
 
-        # Ensures that all experiment trials match the keys of the blank
-        for trial in self.EXPERIMENTAL_TRIALS.values():
-            if not trial.keys() == self.EXPERIMENT_BLANK.keys():
-                try:
-                    logging.warning(
-                        "Trial {trial_id} keys do not match the experiment blank".format(
-                            trial_id = trial["trial_id"]
-                        )
-                    )
-                except (KeyError, AttributeError):
-                    logging.warning(
-                        "Unknown experiment keys do not match the experiment blank. Please check experiment keys and relaunch"
-                    )
-                
-                # Exits the program immedietly if the experimental trials is not formatted correctly
-                self.exit_mainloop()
-                return
-        
-        # Checks that all the trials have valid obstacle states
-        for trial in self.EXPERIMENTAL_TRIALS.values():
-            if(not any(
-                valid_obstacle["left_fg"] == trial["left_fg"] and 
-                valid_obstacle["right_fg"] == trial["right_fg"]
-                for valid_obstacle in self.VALID_OBSTACLES
-            )):
-                logging.warning(
-                    "Trial {trial_id} keys do not match any valid obstacle state".format(
-                        trial_id = trial["trial_id"]
-                    )
-                )
-                # Exits the program immedietly if the experimental trials is not formatted correctly
-                self.exit_mainloop()
-                return
-        
         logging.info("Experiment Trials List: {}".format(self.EXPERIMENTAL_TRIALS))
 
         return
-        
+
+    def watch_trials(self):
+        """Polls the trial file and recompiles it when it changes. The new trials are applied at the next pause
+        """
+
+        try:
+            stamp = self.config.trials_path.stat().st_mtime_ns
+        except OSError:
+            stamp = self.trial_file_stamp # Files are briefly missing while some editors save
+
+        try:
+            if stamp != self.trial_file_stamp:
+                # Stored when the file is loaded, not when the set is applied, so later saves are still picked up.
+                # Stored first so an invalid file is only reported once per save
+                self.trial_file_stamp = stamp
+                try:
+                    self.pending_trial_set = load_trial_set(self.config.trials_path)
+                except TrialDefinitionError as trial_error:
+                    logging.warning("Trial file change ignored: {}".format(trial_error))
+                else:
+                    if self.paused:
+                        self.apply_pending_trials()
+                    else:
+                        logging.info("Trial file changed, new trials will be used from the next pause")
+        finally:
+            # Rescheduled even if a reload fails unexpectedly so watching never stops
+            self.display.after(self.TRIAL_WATCH_MS, self.watch_trials)
+
+        return
+
+    def apply_pending_trials(self):
+        """Swaps in the trial set loaded by the watcher. Must only be called while paused
+        """
+
+        if self.pending_trial_set is None:
+            return
+
+        self.set_trial_set(self.pending_trial_set)
+        self.pending_trial_set = None
+        logging.info("Reloaded experimental trials from {}".format(self.config.trials_path))
+
+        # The obstacle must be rotated if it has been removed from the experiment
+        if not self.trial_set.valid_trials(self.current_obstacle):
+            logging.info("Current obstacle is no longer used by the experiment, please rotate and confirm with 'c'")
+            self.change_obstacle_state = True
+            self.pick_obstacle()
+            self.display.canvas.toggle_obstacle_visibility(True)
+
+        # The current trial is replaced if it was removed or redefined, the blank trial is left until the first obstacle setup
+        if (
+            self.current_trial["trial_id"] is not None
+            and self.current_trial not in self.trial_set.valid_trials(self.current_obstacle)
+        ):
+            self.current_trial = self.generate_trial_state()
+            logging.info("Current trial changed in the trial file, switched trial to: {}".format(self.current_trial))
+
+        self.save_session()
+
+        return
+
+    def save_session(self, sync:bool=False):
+        """Snapshots the current experiment state so it can be resumed after a restart or crash
+
+        Args:
+            sync (bool, optional): Waits for the snapshot to reach the disk, used on exit. Defaults to False.
+        """
+
+        # Nothing to resume until the first obstacle has been picked
+        if self.current_obstacle is None:
+            return
+
+        try:
+            self.session_state.save({
+                "current_obstacle": self.current_obstacle,
+                "trial_id": self.current_trial["trial_id"],
+                "paused": self.paused,
+                "change_obstacle_state": self.change_obstacle_state,
+                "random_state": random.getstate()
+            }, sync)
+        except OSError as error:
+            # Losing a snapshot must never stop the experiment
+            logging.warning("Session snapshot could not be saved: {}".format(error))
+
+        return
+
+    def resume_session(self) -> bool:
+        """Restores the obstacle, trial, pause state and random state from the last snapshot
+
+        Returns:
+            bool: True if the session was restored, False if a new obstacle setup is needed
+        """
+
+        state = self.session_state.load()
+        if state is None:
+            return False
+
+        # The snapshot must still describe a trial in the current trial file
+        current_trial = self.EXPERIMENTAL_TRIALS.get(state["trial_id"])
+        if (
+            state["current_obstacle"] not in self.VALID_OBSTACLES
+            or (current_trial is None and not state["change_obstacle_state"])
+            or (current_trial is not None and current_trial not in self.trial_set.valid_trials(state["current_obstacle"]))
+        ):
+            logging.warning("Session snapshot does not match the experimental trials, starting a new session")
+            return False
+
+        random.setstate(state["random_state"])
+
+        self.current_obstacle = state["current_obstacle"]
+        self.current_trial = current_trial if current_trial is not None else self.EXPERIMENT_BLANK
+        self.display.canvas.set_obstacle_colours(
+            self.current_obstacle["left_fg"],
+            self.current_obstacle["right_fg"]
+        )
+
+        if state["change_obstacle_state"]:
+            # The obstacle change was not confirmed so it is shown again for the experimenter
+            self.toggle_pause(True)
+            self.change_obstacle_state = True
+            self.display.canvas.toggle_obstacle_visibility(True)
+        else:
+            self.toggle_pause(state["paused"])
+
+        logging.info("Restored obstacle {obstacle} in trial {trial}".format(
+            obstacle=self.current_obstacle,
+            trial=self.current_trial
+        ))
+
+        return True
     
     def generate_trial_state(self) -> dict:
         """Generates a random valid trial based on the obstalce state. The current trial must have an obstacle position set
@@ -298,47 +348,40 @@ class masters_Electronics:
             dict: Returns an random valid trial state
         """
         
-        valid_trials = []
-        for trial_setup in list(self.EXPERIMENTAL_TRIALS.values()):
-            if self.current_obstacle["left_fg"].lower() == trial_setup["left_fg"].lower(): # Checks the left obstacle colour
-                if self.current_obstacle["right_fg"].lower() == trial_setup["right_fg"].lower(): # Checks the right obstacle colour
-                    valid_trials.append(trial_setup)
-        return random.choice(valid_trials)
+        # Trials are grouped by obstacle colours when the trial file is loaded
+        return random.choice(self.trial_set.valid_trials(self.current_obstacle))
 
 
     def setup_gpio(self):
-        """Configures the gpio pins
+        """Configures the gpio pins through the gate input backend
         """
 
-        GPIO.setmode(GPIO.BCM)
-        GPIO.setup(
-            [self.config["right_gate_pin"], self.config["left_gate_pin"], self.config["entrance_gate_pin"]],
-            GPIO.IN,
-            pull_up_down=GPIO.PUD_UP
+        self.gate_input = open_gate_input(
+            self.config.gpio_backend.lower(),
+            {
+                "entrance": self.config.entrance_gate_pin,
+                "left": self.config.left_gate_pin,
+                "right": self.config.right_gate_pin
+            },
+            self.config.gate_debounce_us,
+            self.config.gpio_chip
         )
     
     def setup_gpio_callbacks(self):
         """Configures the callbacks to record gate crossing events and change the experiment setup as needed
         """
 
-        GPIO.add_event_detect(
-            int(self.config["entrance_gate_pin"]),
-            GPIO.FALLING,
-            callback=lambda x: self.gate_crossed("entrance"),
-            bouncetime=10
-        )
-        GPIO.add_event_detect(
-            int(self.config["left_gate_pin"]),
-            GPIO.FALLING,
-            callback=lambda x: self.gate_crossed("left"),
-            bouncetime=10
-        )
-        GPIO.add_event_detect(
-            int(self.config["right_gate_pin"]),
-            GPIO.FALLING,
-            callback=lambda x: self.gate_crossed("right"),
-            bouncetime=10
-        )
+        # Edges are queued by the backend and processed on the Tk thread
+        self.poll_gates()
+
+    def poll_gates(self):
+        """Processes the batch of gate edges queued since the last poll
+        """
+
+        for gate_id, epoch_time in self.gate_input.drain():
+            self.gate_crossed(gate_id, epoch_time=epoch_time)
+
+        self.display.after(self.GATE_POLL_MS, self.poll_gates)
 
     def setup_keybinds(self):
         """Setups keybinds to interact with the program while it's fullscreen
@@ -354,15 +397,15 @@ class masters_Electronics:
         self.display.bind("c", lambda e: self.change_obstacle())
 
         # Manual data collection keybinds
-        if "mirror" in self.config["manual_collection"].lower():
+        if "mirror" in self.config.manual_collection.lower():
             self.display.bind("7", lambda e: self.manual_trigger("right"))
             self.display.bind("9", lambda e: self.manual_trigger("left"))
-        elif "facing" in self.config["manual_collection"].lower():
+        elif "facing" in self.config.manual_collection.lower():
             self.display.bind("7", lambda e: self.manual_trigger("left"))
             self.display.bind("9", lambda e: self.manual_trigger("right"))
 
         # Specific debug related keybinds
-        if self.config["DEBUG"]:
+        if self.config.debug:
             # Binds <tab> to rotate experimental setups
             self.display.bind("<Tab>", lambda e: self.next_trial())
 
@@ -383,6 +426,7 @@ class masters_Electronics:
         logging.info("Changed trial to: {}".format(self.current_trial))
 
         self.set_main_rects()
+        self.save_session()
         return
 
     def manual_trigger(self, direction:str):
@@ -445,10 +489,22 @@ class masters_Electronics:
 
             logging.info("Program paused")
             self.set_main_rects("orchid2", "cyan2") # Sets bright pause colours
+
+            # Shows how the session is going so far
+            self.display.canvas.set_summary_text(self.session_summary.summary_text())
+            self.display.canvas.toggle_summary_visibility(True)
+
+            # Trial file changes are only applied while no trial is running
+            self.apply_pending_trials()
+
+            self.profiler.memory_snapshot("pause")
         else:
+            self.display.canvas.toggle_summary_visibility(False)
             self.set_main_rects() # Sets the background back to the current trial state
             logging.info("Program resumed")
 
+        self.save_session()
+
         return
 
     def change_obstacle(self):
@@ -463,7 +519,9 @@ class masters_Electronics:
             self.reset_gate_crossing("all")
 
             # Hides the obstacle setting rectangles
-            self.display.canvas.toggle_obstacle_visibility()
+            self.display.canvas.toggle_obstacle_visibility(False)
+
+            self.session_summary.obstacle_changed()
 
             logging.info(
                 "Changed obstacle to {left}, {right}".format(
@@ -485,6 +543,17 @@ class masters_Electronics:
         # Used to determin if this is setup or confirmation keypress
         self.change_obstacle_state = True
 
+        self.pick_obstacle()
+        self.display.canvas.toggle_obstacle_visibility(True)
+
+        self.save_session()
+
+        return
+
+    def pick_obstacle(self):
+        """Picks a random obstacle state and shows it on the obstacle setting rectangles
+        """
+
         # Picks a random obstacle state
         random_trial = random.choice(self.VALID_OBSTACLES)
 
@@ -496,16 +565,16 @@ class masters_Electronics:
             self.current_obstacle["left_fg"],
             self.current_obstacle["right_fg"]
         )
-        self.display.canvas.toggle_obstacle_visibility()
 
         return
 
-    def gate_crossed(self, gate_id:str, time_offset:float=0):
+    def gate_crossed(self, gate_id:str, time_offset:float=0, epoch_time:float=None):
         """Callback for when the entry gate is crossed to write data and change experimental trial if necessary
 
         Args:
             gate_id (str): The individual ID of the gate interacted with
             time_offset (float, optional): Offset to the current time when the input should be recored. Defaults to 0.
+            epoch_time (float, optional): Time the gate was crossed, e.g. the kernel edge timestamp. Defaults to None for the current time.
         """
 
         # Only write data when the program is not paused
@@ -523,7 +592,7 @@ class masters_Electronics:
                 self.entrance_gate_crossed = True
 
                 # Will stop the display from changing if there is a greater than X ms gap between gate events
-                self.entrance_reset = self.display.after(int(self.config["crossing_timeout"]), self.reset_gate_crossing, gate_id.lower())
+                self.entrance_reset = self.display.after(self.config.entrance_timeout, self.reset_gate_crossing, gate_id.lower())
             
             if gate_id.lower() in ["right", "left"]:
 
@@ -536,14 +605,28 @@ class masters_Electronics:
                 self.exit_gate_crossed = True
 
                 # Will stop the display from changing if thre is a greater than X ms gap between gate events
-                self.exit_reset = self.display.after(int(self.config["crossing_timeout"]), self.reset_gate_crossing, gate_id.lower())
+                self.exit_reset = self.display.after(self.config.exit_timeout, self.reset_gate_crossing, gate_id.lower())
             
 
             # Records the data to the CSV file
-            self.data_writer.record_gate_crossed(gate_id, self.current_trial["trial_id"], time_offset)
+            crossed_time = self.data_writer.record_gate_crossed(gate_id, self.current_trial["trial_id"], time_offset, epoch_time)
+
+            # Keeps the crossing times for the session summary
+            self.session_summary.record_event()
+            if gate_id.lower() == "entrance":
+                self.entrance_time = crossed_time
+            elif gate_id.lower() in ["right", "left"]:
+                self.exit_time = crossed_time
+                self.exit_gate = gate_id.lower()
 
             # Automatic trial rotation
             if self.entrance_gate_crossed and self.exit_gate_crossed:
+                self.session_summary.record_flight(
+                    self.current_trial["trial_id"],
+                    self.exit_gate,
+                    abs(self.exit_time - self.entrance_time)
+                )
+
                 self.reset_gate_crossing("all")
 
                 self.next_trial()
@@ -598,12 +681,34 @@ class masters_Electronics:
         return
 
 
-# Mainloop of the electronics
-if __name__ == "__main__":
+def main():
+    """Entry point loading the config and running the experiment until exit
+    """
+    started = perf_counter()
+
+    try:
+        config = load_config()
+    except ConfigError as config_error:
+        # Logging is not yet configured so the error is printed directly with a failing exit status
+        sys.exit(str(config_error))
+
+    log_stem = setup_logging(config)
     logging.info("Program started")
-    setup = masters_Electronics(config)
+
+    setup = masters_Electronics(config, log_stem)
+
+    # Setup stops before the display is created if the experiment constants are invalid
+    if setup.running is False:
+        setup.profiler.safe_exit()
+        logging.warning("Program exiting before starting")
+        sys.exit(1)
+
+    # Draws the first frame so the startup time can be reported
+    setup.display.update()
+    logging.info("Time to first frame: {:.0f} ms".format((perf_counter() - started)*1000))
 
     # Waits until the obstacle state has been set before starting mainloop
+    from waiting import wait, ANY
     logging.info("Waiting for obstacle setup to be completed")
     wait(
         ANY([
@@ -627,11 +732,19 @@ if __name__ == "__main__":
         setup.display.mainloop()
 
     # Methods to ensure the experiment exits without failure
+    setup.save_session(sync=True)
     setup.data_writer.safe_exit()
+    if setup.gate_input is not None:
+        setup.gate_input.close()
+    setup.profiler.safe_exit()
     logging.info("Mainloop exited")
 
-    if "slowexit" in config["DEBUG"].lower():
+    if config.debug_flag("slowExit"):
         input("Press <Enter> to Exit")
     
     logging.info("Program exited successfully- goodbye!")
 
+
+# Mainloop of the electronics
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+from dataclasses import dataclass, fields, MISSING
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ConfigError(ValueError):
+    """Raised when the environment config is missing a mandatory value or a value is invalid
+    """
+
+
+@dataclass(frozen=True)
+class Config:
+    """The validated experiment config. Field names match the keys in the .env file (DEBUG is stored as debug)
+    """
+
+    # Mandatory values
+    left_gate_pin: int
+    right_gate_pin: int
+    entrance_gate_pin: int
+    crossing_timeout: int
+
+    # Optional values
+    debug: str = ""
+    data_path: Path = Path("data")
+    log_path: Path = Path("logs")
+    manual_collection: str = "false"
+    trials_path: Path = Path("trials.toml")
+    resume_session: bool = False
+    gpio_backend: str = "auto"
+    gpio_chip: int = 0
+    gate_debounce_us: int = 10000
+    entrance_crossing_timeout: int = None
+    exit_crossing_timeout: int = None
+
+    @property
+    def entrance_timeout(self) -> int:
+        """The entrance gate reset timeout in ms, falling back to crossing_timeout
+        """
+        return self.crossing_timeout if self.entrance_crossing_timeout is None else self.entrance_crossing_timeout
+
+    @property
+    def exit_timeout(self) -> int:
+        """The exit gate reset timeout in ms, falling back to crossing_timeout
+        """
+        return self.crossing_timeout if self.exit_crossing_timeout is None else self.exit_crossing_timeout
+
+    def debug_flag(self, flag:str) -> bool:
+        """Checks if a specific debug option is set in the DEBUG string
+
+        Args:
+            flag (str): The debug option, case insensitive e.g. "setSeed"
+        """
+        return flag.lower() in self.debug.lower()
+
+    @classmethod
+    def from_mapping(cls, values:dict) -> "Config":
+        """Parses and validates the raw string values read from the .env file
+
+        Args:
+            values (dict): Raw config values. Missing optional values use the defaults
+
+        Raises:
+            ConfigError: If a mandatory value is missing or a value can not be converted
+        """
+
+        values = dict(values)
+        # The .env file uses DEBUG in capitals for visibility
+        if "DEBUG" in values:
+            values["debug"] = values.pop("DEBUG")
+
+        parsed = {}
+        for field in fields(cls):
+            if values.get(field.name) is None:
+                if field.default is MISSING: # Only mandatory fields have no default
+                    raise ConfigError("MANDATORY CONFIG VALUE '{}' NOT SET, EXITING".format(field.name))
+                continue
+
+            raw = values[field.name].strip()
+            try:
+                if field.type is bool:
+                    if raw.lower() not in ("true", "false"):
+                        raise ValueError(raw)
+                    parsed[field.name] = raw.lower() == "true"
+                elif field.type is int:
+                    parsed[field.name] = int(raw)
+                elif field.type is Path:
+                    parsed[field.name] = Path(raw)
+                else:
+                    parsed[field.name] = raw
+            except ValueError:
+                raise ConfigError("INVALID CONFIG VALUE {}=\"{}\", EXPECTED {}".format(
+                    field.name, raw, field.type.__name__
+                )) from None
+
+        config = cls(**parsed)
+
+        if config.manual_collection.lower() not in ("false", "mirror", "facing"):
+            raise ConfigError(
+                "INVALID ENV OPTION- manual_collection=\"{}\" is not recognised".format(config.manual_collection)
+            )
+
+        if config.gpio_backend.lower() not in ("auto", "lgpio", "rpi"):
+            raise ConfigError(
+                "INVALID ENV OPTION- gpio_backend=\"{}\" is not recognised".format(config.gpio_backend)
+            )
+
+        return config
+
+
+def load_config(env_path:Path=Path(".env")) -> Config:
+    """Reads the .env file and returns the validated config
+
+    Args:
+        env_path (Path, optional): Location of the .env file. Defaults to ".env".
+    """
+
+    # Imported on first use so importing the config does not require python-dotenv
+    from dotenv import dotenv_values
+
+    return Config.from_mapping(dotenv_values(env_path))
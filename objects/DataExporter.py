@@ -0,0 +1,162 @@
+from pathlib import Path
+import hashlib
+import sqlite3
+import csv
+import io
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# Bytes before the cursor offset that are checksummed to detect a file being replaced or truncated
+CHECKSUM_WINDOW = 256
+
+
+class DataExporter:
+    """Class containing the methods to copy newly appended data file rows into a SQLite database
+    """
+
+    def __init__(self, database_path:Path):
+        """Opens the database and creates the tables and indexes if they do not exist
+
+        Args:
+            database_path (Path): Location of the SQLite database file
+        """
+
+        database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(database_path)
+
+        with self.connection:
+            # Rows are keyed by their byte offset so a repeated export can never duplicate them
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS events (
+                    source TEXT NOT NULL,
+                    byte_offset INTEGER NOT NULL,
+                    gate_id TEXT,
+                    epoch_time REAL,
+                    trial_id INTEGER,
+                    PRIMARY KEY (source, byte_offset)
+                )
+            """)
+            self.connection.execute("CREATE INDEX IF NOT EXISTS events_epoch_time ON events (epoch_time)")
+            self.connection.execute("CREATE INDEX IF NOT EXISTS events_trial_id ON events (trial_id)")
+
+            # How far each data file has been exported
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS export_cursors (
+                    source TEXT PRIMARY KEY,
+                    byte_offset INTEGER NOT NULL,
+                    checksum TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL
+                )
+            """)
+
+        logging.info("Exporting to database: {}".format(database_path.absolute()))
+
+    @staticmethod
+    def checksum(open_file, offset:int) -> str:
+        """Hashes the bytes just before an offset
+
+        Args:
+            open_file (BufferedReader): The data file opened in binary mode
+            offset (int): The cursor offset
+        """
+        start = max(0, offset - CHECKSUM_WINDOW)
+        open_file.seek(start)
+        return hashlib.sha256(open_file.read(offset - start)).hexdigest()
+
+    def export_file(self, data_file:Path) -> int:
+        """Exports the complete rows appended to a data file since the last export
+
+        Args:
+            data_file (Path): A csv file written by DataWriter
+
+        Returns:
+            int: The number of rows exported
+        """
+
+        source = data_file.name
+        stat = data_file.stat()
+
+        cursor = self.connection.execute(
+            "SELECT byte_offset, checksum, size, mtime_ns FROM export_cursors WHERE source = ?", (source,)
+        ).fetchone()
+
+        # Files that have not changed are skipped without being opened
+        if cursor is not None and cursor[2] == stat.st_size and cursor[3] == stat.st_mtime_ns:
+            return 0
+
+        with data_file.open("rb") as open_file:
+            offset = 0
+            replaced = False
+            if cursor is not None:
+                offset = cursor[0]
+                if stat.st_size < offset or self.checksum(open_file, offset) != cursor[1]:
+                    logging.warning("{} has changed before the last exported row, exporting it again".format(source))
+                    offset = 0
+                    replaced = True
+
+            # The header gives the column order, DataWriter only writes it once at the start of the file
+            open_file.seek(0)
+            header = open_file.readline()
+            if not header.endswith(b"\n"):
+                return 0 # The header is still being written
+            columns = next(csv.reader([header.decode()]))
+
+            start = max(offset, len(header))
+            open_file.seek(start)
+            appended = open_file.read(stat.st_size - start)
+
+            # Only complete lines are exported, a partly written row is picked up next time
+            end = appended.rfind(b"\n") + 1
+            appended = appended[:end]
+            new_offset = start + end
+
+            rows = []
+            line_offset = start
+            for line in io.BytesIO(appended):
+                values = dict(zip(columns, next(csv.reader([line.decode(errors="replace")]), [])))
+                rows.append((
+                    source,
+                    line_offset,
+                    values.get("gate_id") or None,
+                    self.to_number(values.get("epoch_time"), float),
+                    self.to_number(values.get("trial_id"), int)
+                ))
+                line_offset += len(line)
+
+            checksum = self.checksum(open_file, new_offset)
+
+        # The rows and the cursor are saved in one transaction so an interrupted export is repeated in full
+        with self.connection:
+            if replaced:
+                self.connection.execute("DELETE FROM events WHERE source = ?", (source,))
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO events (source, byte_offset, gate_id, epoch_time, trial_id) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO export_cursors (source, byte_offset, checksum, size, mtime_ns) VALUES (?, ?, ?, ?, ?)",
+                (source, new_offset, checksum, stat.st_size, stat.st_mtime_ns)
+            )
+
+        return len(rows)
+
+    @staticmethod
+    def to_number(value:str, number_type):
+        """Converts a csv value, returning None if it is empty or unreadable
+
+        Args:
+            value (str): The csv value
+            number_type (type): int or float
+        """
+        try:
+            return number_type(value)
+        except (TypeError, ValueError):
+            return None
+
+    def close(self):
+        """Closes the database connection
+        """
+        self.connection.close()
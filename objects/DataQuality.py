@@ -0,0 +1,187 @@
+from collections import deque
+from pathlib import Path
+import csv
+
+import logging
+logger = logging.getLogger(__name__)
+
+from objects.DataReader import EXIT_GATES, iter_events, iter_flights
+
+# Anomaly rows kept per type in a report. The counts always include every anomaly
+MAX_ROWS_PER_ANOMALY = 50
+
+
+class FileScan:
+    """Checks a stream of gate events for recording problems, keeping only constant state per gate
+    """
+
+    def __init__(self, entrance_timeout:float, exit_timeout:float, bounce_interval:float, bounce_burst:int,
+                 rotation_chance:float, trial_choices:dict):
+        """Starts a scan with no anomalies
+
+        Args:
+            entrance_timeout (float): Seconds an exit may be after an entrance and still be part of a flight
+            exit_timeout (float): Seconds an exit may be before an entrance and still be part of a flight
+            bounce_interval (float): Gaps in seconds shorter than this between crossings of one gate are bounce
+            bounce_burst (int): Number of bouncing crossings in a row reported as a burst
+            rotation_chance (float): Runs of flights in one trial less likely than this under random rotation are reported
+            trial_choices (dict): Trial id: number of trials valid for the obstacle of that trial
+        """
+
+        self.entrance_timeout = entrance_timeout
+        self.exit_timeout = exit_timeout
+        self.bounce_interval = bounce_interval
+        self.bounce_burst = bounce_burst
+        self.rotation_chance = rotation_chance
+        self.trial_choices = trial_choices
+
+        self.rows = 0
+        self.anomalies = {}
+        self.counts = {}
+
+        self.previous_time = None
+        self.last_entrance = None
+        self.pending_exits = deque() # (row, time) of exits with no entrance yet within the timeout
+
+        # gate: [time of last crossing, crossings in the current burst, row the burst started]
+        self.bursts = {}
+
+    def flag(self, anomaly:str, row:int):
+        """Records an anomaly at a row
+
+        Args:
+            anomaly (str): The anomaly type
+            row (int): Line number in the data file
+        """
+        self.counts[anomaly] = self.counts.get(anomaly, 0) + 1
+        rows = self.anomalies.setdefault(anomaly, [])
+        if len(rows) < MAX_ROWS_PER_ANOMALY:
+            rows.append(row)
+
+    def check_events(self, events):
+        """Checks each event as it passes through, so the same stream can also be used to rebuild flights
+
+        Args:
+            events (iterable): GateEvents in file order
+
+        Yields:
+            GateEvent: The events unchanged
+        """
+
+        for event in events:
+            self.rows += 1
+
+            if event.trial_id is None:
+                self.flag("trial_id_none", event.row)
+
+            if self.previous_time is not None and event.epoch_time < self.previous_time:
+                self.flag("non_monotonic_time", event.row)
+            self.previous_time = event.epoch_time
+
+            # Exits are orphans if no entrance was crossed within the gate timeouts either side of them
+            while self.pending_exits and event.epoch_time - self.pending_exits[0][1] > self.exit_timeout:
+                self.flag("orphan_exit", self.pending_exits.popleft()[0])
+
+            if event.gate_id == "entrance":
+                self.last_entrance = event.epoch_time
+                self.pending_exits.clear()
+            elif event.gate_id in EXIT_GATES:
+                bounced = event.gate_id in self.bursts and event.epoch_time - self.bursts[event.gate_id][0] < self.bounce_interval
+                near_entrance = self.last_entrance is not None and event.epoch_time - self.last_entrance <= self.entrance_timeout
+                if not bounced and not near_entrance:
+                    self.pending_exits.append((event.row, event.epoch_time))
+            else:
+                self.flag("unknown_gate", event.row)
+                yield event
+                continue
+
+            self.check_bounce(event)
+
+            yield event
+
+        for row, _ in self.pending_exits:
+            self.flag("orphan_exit", row)
+        self.pending_exits.clear()
+
+    def check_bounce(self, event):
+        """Reports runs of crossings of one gate closer together than the bounce interval
+
+        Args:
+            event (GateEvent): The gate event
+        """
+
+        burst = self.bursts.get(event.gate_id)
+        if burst is not None and event.epoch_time - burst[0] < self.bounce_interval:
+            burst[1] += 1
+            # Reported once when the run reaches the burst length
+            if burst[1] == self.bounce_burst:
+                self.flag("bounce_burst", burst[2])
+            burst[0] = event.epoch_time
+        else:
+            self.bursts[event.gate_id] = [event.epoch_time, 1, event.row]
+
+    def check_rotation(self, flights):
+        """Reports runs of flights in one trial too unlikely to come from the controller. A random valid trial
+        is picked after every flight, so each repeat of a trial has a chance of one over the number of
+        trials valid for its obstacle. Trials that are alone on their obstacle or missing from the trial file are not checked
+
+        Args:
+            flights (iterable): Flights in file order
+        """
+
+        run_trial = None
+        run_chance = 1.0
+        run_row = None
+        for flight in flights:
+            if flight.trial_id == run_trial:
+                choices = self.trial_choices.get(run_trial, 1)
+                if choices < 2:
+                    continue
+                run_chance /= choices
+                # Reported once when the run becomes too unlikely
+                if run_chance < self.rotation_chance <= run_chance * choices:
+                    self.flag("trial_not_rotated", run_row)
+            else:
+                run_trial = flight.trial_id
+                run_chance = 1.0
+                run_row = flight.row
+
+
+def scan_file(data_file:Path, entrance_timeout:float, exit_timeout:float, bounce_interval:float, bounce_burst:int,
+              rotation_chance:float, trial_choices:list) -> dict:
+    """Scans one data file for anomalies. Run in a worker process per file
+
+    Args:
+        data_file (Path): A csv file written by DataWriter
+        entrance_timeout (float): Seconds an exit may be after an entrance and still be part of a flight
+        exit_timeout (float): Seconds an exit may be before an entrance and still be part of a flight
+        bounce_interval (float): Gaps in seconds shorter than this between crossings of one gate are bounce
+        bounce_burst (int): Number of bouncing crossings in a row reported as a burst
+        rotation_chance (float): Runs of flights in one trial less likely than this under random rotation are reported
+        trial_choices (list): [trial id, number of trials valid for its obstacle] pairs, a list so it can be cached as json
+
+    Returns:
+        dict: The file report with the row count, anomaly counts and the first rows of each anomaly
+    """
+
+    data_file = Path(data_file)
+    stat = data_file.stat()
+
+    scan = FileScan(entrance_timeout, exit_timeout, bounce_interval, bounce_burst, rotation_chance, dict(trial_choices))
+    bad_rows = []
+    try:
+        scan.check_rotation(iter_flights(scan.check_events(iter_events(data_file, bad_rows)), entrance_timeout, exit_timeout))
+    except (csv.Error, UnicodeDecodeError) as error:
+        # The rest of the file can not be parsed, the anomalies found so far are kept
+        scan.flag("unreadable_file", scan.rows + 2)
+        logging.warning("{} could not be fully read: {}".format(data_file, error))
+    for row in bad_rows:
+        scan.flag("unreadable_row", row)
+
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "rows": scan.rows + len(bad_rows),
+        "counts": scan.counts,
+        "anomalies": scan.anomalies
+    }
@@ -0,0 +1,93 @@
+from collections import namedtuple
+from pathlib import Path
+import csv
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# A single row of a DataWriter file. trial_id is None when recorded before the first trial was set
+GateEvent = namedtuple("GateEvent", ["row", "gate_id", "epoch_time", "trial_id"])
+
+# A bird flight reconstructed from an entrance and an exit gate crossing
+Flight = namedtuple("Flight", ["trial_id", "direction", "entrance_time", "exit_time", "row"])
+
+EXIT_GATES = ("left", "right")
+
+
+def data_files(data_path:Path) -> list:
+    """Lists the day data files written by DataWriter in date order
+
+    Args:
+        data_path (Path): Path to the data folder
+    """
+    return sorted(Path(data_path).glob("*.csv"))
+
+
+def iter_events(data_file:Path, bad_rows:list=None):
+    """Streams the gate events from a data file without loading the whole file
+
+    Args:
+        data_file (Path): A csv file written by DataWriter
+        bad_rows (list, optional): Collects the line numbers of unreadable rows instead of logging them. Defaults to None.
+
+    Yields:
+        GateEvent: Each readable row. row is the line number in the file, the header is line 1
+    """
+
+    with Path(data_file).open(newline="") as open_file:
+        for row_number, row in enumerate(csv.DictReader(open_file), start=2):
+            try:
+                epoch_time = float(row["epoch_time"])
+            except (TypeError, ValueError):
+                if bad_rows is None:
+                    logging.warning("{file}:{row} has an unreadable epoch_time, skipping".format(file=data_file, row=row_number))
+                else:
+                    bad_rows.append(row_number)
+                continue
+
+            trial_id = row["trial_id"]
+            trial_id = int(trial_id) if trial_id and trial_id.isdigit() else None
+
+            yield GateEvent(row_number, (row["gate_id"] or "").lower(), epoch_time, trial_id)
+
+
+def iter_flights(events, entrance_timeout:float, exit_timeout:float=None):
+    """Reconstructs flights from gate events the same way the controller pairs gate crossings
+
+    Args:
+        events (iterable): GateEvents in time order
+        entrance_timeout (float): Seconds the entrance gate stays crossed after its last event
+        exit_timeout (float, optional): Seconds an exit gate stays crossed after its last event. Defaults to the entrance_timeout.
+
+    Yields:
+        Flight: Each completed flight, in the trial recorded with the event that completed it. row is the line of that event
+    """
+
+    if exit_timeout is None:
+        exit_timeout = entrance_timeout
+
+    entrance_time = None
+    exit_time = None
+    exit_gate = None
+
+    for event in events:
+        # Expires gates whose reset timer would have run out
+        if entrance_time is not None and event.epoch_time - entrance_time > entrance_timeout:
+            entrance_time = None
+        if exit_time is not None and event.epoch_time - exit_time > exit_timeout:
+            exit_time = None
+
+        if event.gate_id == "entrance":
+            entrance_time = event.epoch_time
+        elif event.gate_id in EXIT_GATES:
+            exit_time = event.epoch_time
+            exit_gate = event.gate_id
+        else:
+            continue
+
+        if entrance_time is not None and exit_time is not None:
+            if event.trial_id is not None:
+                yield Flight(event.trial_id, exit_gate, entrance_time, exit_time, event.row)
+            entrance_time = None
+            exit_time = None
@@ -47,18 +47,22 @@ class DataWriter:
 
         logging.info("Data writer open at file: {}".format(str(self.data_file.absolute())))
 
-    def record_gate_crossed(self, gate_id:str, trial_id:int, time_offset:float=0):
+    def record_gate_crossed(self, gate_id:str, trial_id:int, time_offset:float=0, epoch_time:float=None) -> float:
         """Write to csv file the gate_id and the time crossed
 
         Args:
             gate_id (str): The individual ID of the gate interacted with
             trial_id (int): The id number of the current trial setup
             time_offset (float, optional): Offset to the current time when the input should be recored. Defaults to 0.
+            epoch_time (float, optional): Time the gate was crossed. Defaults to None for the current time.
+
+        Returns:
+            float: The epoch time recorded for the crossing
         """
 
         data = self.data_blank
         data["gate_id"] = gate_id
-        data["epoch_time"] = current_epoch() + time_offset
+        data["epoch_time"] = (current_epoch() if epoch_time is None else epoch_time) + time_offset
         data["trial_id"] = trial_id
 
         # CSV object add a row
@@ -67,6 +71,8 @@ class DataWriter:
         self.open_file.flush() # Helps ensure the data is written before the file is closed
 
         logging.info("Gate crossed: {}".format(data))
+
+        return data["epoch_time"]
     
     def safe_exit(self):
         """Ensures the data file is closed and information is written to memory
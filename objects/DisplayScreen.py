@@ -66,6 +66,17 @@ class ExperimentCanvas(tk.Canvas):
         self.set_obstacle_colours("#00ff00", "#ffff00") # Silly colours to make it clear if it goes wrong
         self.toggle_obstacle_visibility(False)
 
+        # Text shown above the obstacle rectangles to summarise the session while paused
+        self.summary_text = self.create_text(
+            self.width/2,
+            self.height/4,
+            text="",
+            fill="black",
+            font=("TkDefaultFont", 24),
+            justify="center"
+        )
+        self.toggle_summary_visibility(False)
+
         # Pixel to keep the TV from displaying a screensaver
         self.jiggle_state = True
         self.jiggle_timer_ms = 1000
@@ -130,6 +141,30 @@ class ExperimentCanvas(tk.Canvas):
         self.itemconfigure(self.left_obstalce_rect, state=current_obstacle_state)
         self.itemconfigure(self.right_obstalce_rect, state=current_obstacle_state)
     
+    def set_summary_text(self, text:str):
+        """Sets the text of the session summary overlay
+
+        Args:
+            text (str): The summary text, may contain new lines
+        """
+
+        self.itemconfigure(self.summary_text, text=text)
+
+    def toggle_summary_visibility(self, forced_state:bool=None):
+        """Switches the visibility of the session summary overlay
+
+        Args:
+            forced_state (bool, optional): If the current state of the summary visibilty must be forced use True/False. Defaults to None.
+        """
+
+        # If forced state not set toggle the current state
+        if forced_state is None:
+            self.current_summary_visibility = not self.current_summary_visibility
+        else:
+            self.current_summary_visibility = forced_state
+
+        self.itemconfigure(self.summary_text, state="normal" if self.current_summary_visibility else "hidden")
+    
     def match_colour(self, colour:str):
         """Will match specific colour names to hex values.
         This function allows arbirotry colour names in the experimental trials to make experiment clear
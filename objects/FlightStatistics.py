@@ -0,0 +1,142 @@
+from pathlib import Path
+
+import logging
+logger = logging.getLogger(__name__)
+
+from objects.DataReader import iter_events, iter_flights
+
+
+def count_choices(data_file:Path, entrance_timeout:float, exit_timeout:float=None) -> dict:
+    """Counts the left and right exits per trial in one data file. Run in a worker process per file
+
+    Args:
+        data_file (Path): A csv file written by DataWriter
+        entrance_timeout (float): Seconds the entrance gate stays crossed after its last event
+        exit_timeout (float, optional): Seconds an exit gate stays crossed after its last event. Defaults to the entrance_timeout.
+
+    Returns:
+        dict: trial_id: [left exits, right exits]
+    """
+
+    counts = {}
+    for flight in iter_flights(iter_events(data_file), entrance_timeout, exit_timeout):
+        trial_counts = counts.setdefault(flight.trial_id, [0, 0])
+        trial_counts[0 if flight.direction == "left" else 1] += 1
+
+    return counts
+
+
+def experiment_sets(trials:dict) -> dict:
+    """Groups the trials by the cue that differs between the left and right side
+
+    Trials where only the background differs test background brightness (towards the light side),
+    trials where only the foreground differs test edge contrast (towards the white edge)
+
+    Args:
+        trials (dict): trial_id: trial, as in TrialSet.trials
+
+    Returns:
+        dict: set name: {"left": trial ids with the cue on the left, "right": trial ids with the cue on the right}
+    """
+
+    sets = {
+        "background brightness": {"left": [], "right": []},
+        "edge contrast": {"left": [], "right": []}
+    }
+    for trial_id, trial in trials.items():
+        background_differs = trial["left_bg"] != trial["right_bg"]
+        foreground_differs = trial["left_fg"] != trial["right_fg"]
+
+        if background_differs and not foreground_differs:
+            side = "left" if trial["left_bg"] == "light" else "right"
+            sets["background brightness"][side].append(trial_id)
+        elif foreground_differs and not background_differs:
+            side = "left" if trial["left_fg"] == "white" else "right"
+            sets["edge contrast"][side].append(trial_id)
+
+    return sets
+
+
+def trial_task(label:str, left:int, right:int, resamples:int, seed, confidence:float=0.95) -> dict:
+    """Bootstrap CI of the proportion of left exits and a permutation test against no side preference
+
+    The flights are binary so resampling n flights with replacement gives a binomial count of left exits,
+    and randomly relabelling each exit under the null gives a Binomial(n, 0.5) count. Both are drawn
+    directly in one vectorised call instead of building resample index arrays
+
+    Args:
+        label (str): Name shown in the results
+        left (int): Number of left exits
+        right (int): Number of right exits
+        resamples (int): Number of bootstrap and permutation resamples
+        seed (numpy.random.SeedSequence): Seed for this task
+        confidence (float, optional): Confidence level of the interval. Defaults to 0.95.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    flights = left + right
+    result = {"label": label, "flights": flights, "left": left, "right": right}
+    if not flights:
+        return result
+
+    observed = left / flights
+
+    bootstrap = rng.binomial(flights, observed, size=resamples) / flights
+    tail = (1 - confidence) / 2
+    result["p_left"] = observed
+    result["ci_low"], result["ci_high"] = np.quantile(bootstrap, [tail, 1 - tail])
+
+    # Two sided, counting resamples at least as far from an even split as the observed data
+    null = rng.binomial(flights, 0.5, size=resamples)
+    extreme = np.abs(null - flights/2) >= abs(left - flights/2)
+    result["p_value"] = (1 + extreme.sum()) / (1 + resamples)
+
+    return result
+
+
+def set_task(label:str, cue_left:list, cue_right:list, resamples:int, seed, confidence:float=0.95) -> dict:
+    """Bootstrap CI of the preference for the cue side and a permutation test that the cue side changes the exit choice
+
+    The test compares the proportion of left exits when the cue is on the left with when it is on the right,
+    so a constant side bias of the tunnel does not count as a cue preference. Shuffling the cue labels of the
+    flights gives a hypergeometric count of left exits in the cue left group, drawn in one vectorised call
+
+    Args:
+        label (str): Name shown in the results
+        cue_left (list): [left exits, right exits] summed over the trials with the cue on the left
+        cue_right (list): [left exits, right exits] summed over the trials with the cue on the right
+        resamples (int): Number of bootstrap and permutation resamples
+        seed (numpy.random.SeedSequence): Seed for this task
+        confidence (float, optional): Confidence level of the interval. Defaults to 0.95.
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    left_flights = sum(cue_left)
+    right_flights = sum(cue_right)
+    towards_cue = cue_left[0] + cue_right[1]
+    flights = left_flights + right_flights
+    result = {"label": label, "flights": flights, "towards_cue": towards_cue}
+    if not left_flights or not right_flights:
+        return result
+
+    observed = towards_cue / flights
+    result["p_towards_cue"] = observed
+
+    # Resamples each group separately so the CI respects the balance of cue sides
+    bootstrap = (
+        rng.binomial(left_flights, cue_left[0]/left_flights, size=resamples)
+        + rng.binomial(right_flights, cue_right[1]/right_flights, size=resamples)
+    ) / flights
+    tail = (1 - confidence) / 2
+    result["ci_low"], result["ci_high"] = np.quantile(bootstrap, [tail, 1 - tail])
+
+    observed_difference = cue_left[0]/left_flights - cue_right[0]/right_flights
+    total_left = cue_left[0] + cue_right[0]
+    shuffled_left = rng.hypergeometric(total_left, flights - total_left, left_flights, size=resamples)
+    null_difference = shuffled_left/left_flights - (total_left - shuffled_left)/right_flights
+    extreme = np.abs(null_difference) >= abs(observed_difference) - 1e-12
+    result["p_value"] = (1 + extreme.sum()) / (1 + resamples)
+
+    return result
@@ -0,0 +1,187 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from time import time as current_epoch
+from time import monotonic
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def import_gpio():
+    """Imports GPIO on first use, but for laptop testing imports Mock.GPIO instead
+    """
+    try:
+        import RPi.GPIO as GPIO # type: ignore
+    except (ImportError, RuntimeError):
+        import Mock.GPIO as GPIO
+        logging.warning("Mock.GPIO used. This is probally due to laptop testing but if not this is a problem!")
+
+    return GPIO
+
+
+class GateInput(ABC):
+    """Base class for the gate sensor backends. Edges are queued by the backend thread and collected
+    in batches by the Tk thread with drain, so no Tk calls are made from GPIO threads
+    """
+
+    def __init__(self, pins:dict, debounce_us:int):
+        """Stores the gate pins, subclasses start listening for falling edges
+
+        Args:
+            pins (dict): Gate id: BCM pin number
+            debounce_us (int): Minimum time in microseconds a level must be stable to count as an edge
+        """
+
+        self.pins = pins
+        self.gate_ids = {pin: gate_id for gate_id, pin in pins.items()}
+        self.debounce_us = debounce_us
+
+        # (gate id, edge time) pairs. Appending and popping a deque is thread safe
+        self.events = deque()
+
+    def drain(self) -> list:
+        """Collects all the edges queued since the last call
+
+        Returns:
+            list: (gate id, epoch time) pairs in the order they occured
+        """
+
+        batch = []
+        while self.events:
+            batch.append(self.events.popleft())
+
+        return batch
+
+    @abstractmethod
+    def close(self):
+        """Stops listening to the gates and releases the pins
+        """
+
+
+class RPiGPIOInput(GateInput):
+    """Gate input using the RPi.GPIO interface, either rpi-lgpio on the Pi or Mock.GPIO for laptop testing.
+    Edges are timestamped when the Python callback runs
+    """
+
+    def __init__(self, pins:dict, debounce_us:int):
+        GateInput.__init__(self, pins, debounce_us)
+
+        self.gpio = import_gpio()
+
+        self.gpio.setmode(self.gpio.BCM)
+        self.gpio.setup(list(self.pins.values()), self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+
+        for gate_id, pin in self.pins.items():
+            self.gpio.add_event_detect(
+                pin,
+                self.gpio.FALLING,
+                callback=lambda channel, gate_id=gate_id: self.events.append((gate_id, current_epoch())),
+                bouncetime=max(1, self.debounce_us // 1000) # bouncetime is in whole ms
+            )
+
+        logging.info("RPi.GPIO gate input listening on {}".format(self.pins))
+
+    def close(self):
+        for pin in self.pins.values():
+            self.gpio.remove_event_detect(pin)
+        self.gpio.cleanup(list(self.pins.values()))
+
+
+class LgpioInput(GateInput):
+    """Gate input using lgpio alerts directly. The kernel timestamps each edge and filters glitches
+    shorter than the debounce time before they reach Python
+    """
+
+    def __init__(self, pins:dict, debounce_us:int, chip:int=0):
+        """Claims the gate pins for alerts on the gpiochip
+
+        Args:
+            pins (dict): Gate id: BCM pin number
+            debounce_us (int): Minimum time in microseconds a level must be stable to count as an edge
+            chip (int, optional): The gpiochip number. Defaults to 0.
+        """
+        GateInput.__init__(self, pins, debounce_us)
+
+        import lgpio # type: ignore
+        self.lgpio = lgpio
+
+        self.handle = lgpio.gpiochip_open(chip)
+        self.claimed = []
+        self.callbacks = []
+        try:
+            for pin in self.pins.values():
+                lgpio.gpio_claim_alert(self.handle, pin, lgpio.FALLING_EDGE, lgpio.SET_PULL_UP)
+                self.claimed.append(pin)
+                lgpio.gpio_set_debounce_micros(self.handle, pin, self.debounce_us)
+                self.callbacks.append(lgpio.callback(self.handle, pin, lgpio.FALLING_EDGE, self.edge))
+        except lgpio.error:
+            # Releases the pins claimed so far so another backend can use the chip
+            self.close()
+            raise
+
+        logging.info("lgpio gate input listening on {}".format(self.pins))
+
+    def edge(self, chip:int, gpio:int, level:int, tick:int):
+        """Alert callback from the lgpio notification thread. Kept minimal as it runs once per edge
+
+        Args:
+            chip (int): The gpiochip number
+            gpio (int): The pin number
+            level (int): The new level, 2 is a watchdog timeout rather than an edge
+            tick (int): Kernel timestamp of the edge in nanoseconds
+        """
+        if level == 0:
+            self.events.append((self.gate_ids[gpio], tick))
+
+    def drain(self) -> list:
+        batch = GateInput.drain(self)
+        if not batch:
+            return batch
+
+        # Kernel ticks are either realtime or monotonic depending on the kernel, monotonic ticks are
+        # converted using the current offset between the clocks
+        now = current_epoch()
+        offset = now - monotonic()
+        converted = []
+        for gate_id, tick in batch:
+            seconds = tick / 1e9
+            if abs(now - seconds) > 86400:
+                seconds += offset
+            converted.append((gate_id, seconds))
+
+        return converted
+
+    def close(self):
+        for callback in self.callbacks:
+            callback.cancel()
+        for pin in self.claimed:
+            self.lgpio.gpio_free(self.handle, pin)
+        self.lgpio.gpiochip_close(self.handle)
+
+
+def open_gate_input(backend:str, pins:dict, debounce_us:int, chip:int=0) -> GateInput:
+    """Starts the requested gate input backend
+
+    Args:
+        backend (str): "lgpio", "rpi" or "auto" to use lgpio when it is installed
+        pins (dict): Gate id: BCM pin number
+        debounce_us (int): Minimum time in microseconds a level must be stable to count as an edge
+        chip (int, optional): The gpiochip number used by lgpio. Defaults to 0.
+    """
+
+    if backend == "lgpio":
+        return LgpioInput(pins, debounce_us, chip)
+
+    if backend == "auto":
+        # lgpio may be missing or have no gpiochip when laptop testing
+        try:
+            import lgpio # type: ignore
+        except ImportError as error:
+            logging.warning("lgpio gate input unavailable ({}), falling back to RPi.GPIO".format(error))
+        else:
+            try:
+                return LgpioInput(pins, debounce_us, chip)
+            except lgpio.error as error:
+                logging.warning("lgpio gate input unavailable ({}), falling back to RPi.GPIO".format(error))
+
+    return RPiGPIOInput(pins, debounce_us)
@@ -0,0 +1,236 @@
+from pathlib import Path
+from collections import Counter
+from time import perf_counter
+import threading
+import sys
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class Profiler:
+    """Class containing the optional profiling hooks enabled through the DEBUG flag
+    """
+
+    def __init__(self, debug_flags:str, output_stem:Path):
+        """Starts the profilers requested in the debug flags
+
+        Args:
+            debug_flags (str): The DEBUG config value. Recognises "profileLoop", "profileMemory" and "profileCallbacks"
+            output_stem (Path): Path of the session log without the suffix. Profiler output is saved next to it
+        """
+
+        debug_flags = debug_flags.lower()
+
+        self.output_stem = output_stem
+
+        self.loop_profiling = "profileloop" in debug_flags
+        self.memory_profiling = "profilememory" in debug_flags
+        self.callback_profiling = "profilecallbacks" in debug_flags
+
+        # Number of top hot spots included in the summaries
+        self.top_count = 10
+
+        # Sampling profiler over the main (Tk) thread
+        # ===========================================
+        self.sample_interval = 0.015 # Seconds between stack samples
+        self.stack_samples = Counter()
+        self.sample_total = 0
+        self.stop_sampling = threading.Event()
+        if self.loop_profiling:
+            self.main_thread_id = threading.main_thread().ident
+            self.sampler = threading.Thread(target=self.sample_loop, name="profiler_sampler", daemon=True)
+            self.sampler.start()
+            logging.info("Main loop sampling profiler started")
+
+        # Memory snapshots
+        # ================
+        self.previous_snapshot = None
+        self.snapshot_count = 0
+        if self.memory_profiling:
+            import tracemalloc
+            tracemalloc.start()
+            logging.info("tracemalloc started")
+
+        # Callback timings, callback name: [calls, total seconds, max seconds]
+        # ====================================================================
+        self.callback_timings = {}
+        if self.callback_profiling:
+            logging.info("Callback timing enabled")
+
+    @property
+    def enabled(self) -> bool:
+        """True if any of the profilers are running
+        """
+        return self.loop_profiling or self.memory_profiling or self.callback_profiling
+
+    def sample_loop(self):
+        """Periodically records the stack of the main thread until stopped. Frames are stored raw and
+        only formatted on exit so the sampler holds the GIL for as little time as possible
+        """
+
+        while not self.stop_sampling.wait(self.sample_interval):
+            frame = sys._current_frames().get(self.main_thread_id)
+
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, frame.f_lineno))
+                frame = frame.f_back
+
+            if stack:
+                # Stored root first so the output is in collapsed stack format
+                stack.reverse()
+                self.stack_samples[tuple(stack)] += 1
+                self.sample_total += 1
+
+    @staticmethod
+    def format_frame(frame:tuple) -> str:
+        """Formats a sampled frame for the output
+
+        Args:
+            frame (tuple): (file name, function name, line number)
+        """
+        return "{func} ({file}:{line})".format(func=frame[1], file=Path(frame[0]).name, line=frame[2])
+
+    def wrap(self, name:str, callback):
+        """Wraps a callback so every call is timed. Returns the callback unchanged if callback profiling is off
+
+        Args:
+            name (str): Name the timings are recorded under
+            callback (function): The callback to be timed
+        """
+
+        if not self.callback_profiling:
+            return callback
+
+        timing = self.callback_timings.setdefault(name, [0, 0.0, 0.0])
+
+        def timed_callback(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return callback(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                timing[0] += 1
+                timing[1] += elapsed
+                if elapsed > timing[2]: timing[2] = elapsed
+
+        return timed_callback
+
+    def instrument(self, widget):
+        """Replaces the after and bind methods of a Tk widget so all callbacks registered through them are timed
+
+        Args:
+            widget (tk.Misc): Widget to instrument
+        """
+
+        if not self.callback_profiling:
+            return
+
+        original_after = widget.after
+        original_bind = widget.bind
+
+        def after(ms, func=None, *args):
+            if func is None:
+                return original_after(ms)
+            return original_after(ms, self.wrap("after:{}".format(getattr(func, "__name__", func)), func), *args)
+
+        def bind(sequence=None, func=None, add=None):
+            if func is None:
+                return original_bind(sequence, func, add)
+            return original_bind(sequence, self.wrap("bind:{}".format(sequence), func), add)
+
+        widget.after = after
+        widget.bind = bind
+
+    def memory_snapshot(self, label:str):
+        """Takes a tracemalloc snapshot and appends the top allocations to the memory report
+
+        Args:
+            label (str): Reason for the snapshot, e.g. "pause" or "exit"
+        """
+
+        if not self.memory_profiling:
+            return
+
+        import tracemalloc
+
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__)
+        ])
+        self.snapshot_count += 1
+
+        current, peak = tracemalloc.get_traced_memory()
+        lines = ["=== Snapshot {count} ({label}) current={current:.1f} KiB peak={peak:.1f} KiB ===".format(
+            count=self.snapshot_count,
+            label=label,
+            current=current/1024,
+            peak=peak/1024
+        )]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top_count]]
+
+        # Growth since the last snapshot is the most useful for finding leaks
+        if self.previous_snapshot is not None:
+            lines.append("--- Change since snapshot {} ---".format(self.snapshot_count - 1))
+            lines += [str(stat) for stat in snapshot.compare_to(self.previous_snapshot, "lineno")[:self.top_count]]
+        self.previous_snapshot = snapshot
+
+        with self.output_stem.with_suffix(".memory.txt").open("a") as memory_file:
+            memory_file.write("\n".join(lines) + "\n\n")
+
+        logging.info("Memory snapshot {count} taken at {label}: {current:.1f} KiB in use".format(
+            count=self.snapshot_count,
+            label=label,
+            current=current/1024
+        ))
+
+    def safe_exit(self):
+        """Stops the profilers, writes their output and logs a summary of the top hot spots
+        """
+
+        if self.loop_profiling:
+            self.stop_sampling.set()
+            self.sampler.join(timeout=1)
+
+            # Collapsed stacks can be loaded directly into flame graph tools
+            with self.output_stem.with_suffix(".samples.txt").open("w") as samples_file:
+                for stack, count in self.stack_samples.most_common():
+                    samples_file.write("{} {}\n".format(";".join(map(self.format_frame, stack)), count))
+
+            # Leaf frames are where the time is actually spent
+            leaf_counts = Counter()
+            for stack, count in self.stack_samples.items():
+                leaf_counts[stack[-1]] += count
+
+            logging.info("Main loop hot spots ({} samples):".format(self.sample_total))
+            for leaf, count in leaf_counts.most_common(self.top_count):
+                logging.info("    {percent:5.1f}% {leaf}".format(
+                    percent=100*count/max(self.sample_total, 1), leaf=self.format_frame(leaf)
+                ))
+
+        if self.memory_profiling:
+            self.memory_snapshot("exit")
+            import tracemalloc
+            tracemalloc.stop()
+
+        if self.callback_profiling:
+            ranked = sorted(self.callback_timings.items(), key=lambda item: item[1][1], reverse=True)
+
+            with self.output_stem.with_suffix(".callbacks.txt").open("w") as callbacks_file:
+                callbacks_file.write("callback,calls,total_ms,mean_ms,max_ms\n")
+                for name, (calls, total, maximum) in ranked:
+                    if not calls: continue
+                    callbacks_file.write("{},{},{:.3f},{:.3f},{:.3f}\n".format(
+                        name, calls, total*1000, total*1000/calls, maximum*1000
+                    ))
+
+            logging.info("Slowest callbacks by total time:")
+            for name, (calls, total, maximum) in ranked[:self.top_count]:
+                if not calls: continue
+                logging.info("    {name}: {calls} calls, {total:.1f} ms total, {maximum:.2f} ms max".format(
+                    name=name, calls=calls, total=total*1000, maximum=maximum*1000
+                ))
+
+        if self.enabled:
+            logging.info("Profiler output saved next to {}".format(self.output_stem.with_suffix(".log")))
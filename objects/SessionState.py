@@ -0,0 +1,76 @@
+from pathlib import Path
+from time import time as current_epoch
+import pickle
+import os
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SessionState:
+    """Class containing the methods to snapshot and restore the experiment state between program runs
+    """
+
+    # Increased whenever the snapshot contents change so old snapshots are not misread
+    VERSION = 1
+
+    def __init__(self, state_file:Path):
+        """Sets the location of the snapshot file
+
+        Args:
+            state_file (Path): Path the snapshot is saved to
+        """
+
+        self.state_file = state_file
+        self.temp_file = state_file.with_name(state_file.name + ".tmp")
+
+        # Creates the parent file path if it does not exist
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+    def save(self, state:dict, sync:bool=False):
+        """Atomically replaces the snapshot with the given state. A crash mid write leaves the previous snapshot intact
+
+        Args:
+            state (dict): The experiment state, must be picklable
+            sync (bool, optional): Waits for the snapshot to reach the disk. Defaults to False.
+        """
+
+        blob = pickle.dumps(
+            {"version": self.VERSION, "saved_at": current_epoch(), **state},
+            protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+        with self.temp_file.open("wb") as temp_file:
+            temp_file.write(blob)
+            # An fsync can take tens of ms on an SD card so it is only used for the exit snapshot.
+            # Without it a power cut can lose the latest snapshots, an unreadable snapshot is rejected by load
+            if sync:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+
+        os.replace(self.temp_file, self.state_file)
+
+    def load(self) -> dict:
+        """Reads the last snapshot
+
+        Returns:
+            dict: The saved state, or None if there is no usable snapshot
+        """
+
+        try:
+            with self.state_file.open("rb") as state_file:
+                state = pickle.load(state_file)
+        except FileNotFoundError:
+            logging.info("No session snapshot found at {}".format(self.state_file))
+            return None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError) as error:
+            logging.warning("Session snapshot {} could not be read: {}".format(self.state_file, error))
+            return None
+
+        if not isinstance(state, dict) or state.get("version") != self.VERSION:
+            logging.warning("Session snapshot {} is from an incompatible version".format(self.state_file))
+            return None
+
+        logging.info("Loaded session snapshot saved {:.0f} s ago".format(current_epoch() - state["saved_at"]))
+
+        return state
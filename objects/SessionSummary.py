@@ -0,0 +1,67 @@
+import logging
+logger = logging.getLogger(__name__)
+
+
+class SessionSummary:
+    """Running aggregates of the current session, updated in constant time per gate event
+    """
+
+    def __init__(self):
+        """Starts the aggregates from zero
+        """
+
+        self.flights_per_trial = {}
+        self.choices = {"left": 0, "right": 0}
+        self.flight_count = 0
+        self.flight_time_total = 0.0
+        self.event_count = 0
+        self.events_since_obstacle_change = 0
+
+    def record_event(self):
+        """Counts a recorded gate crossing
+        """
+        self.event_count += 1
+        self.events_since_obstacle_change += 1
+
+    def record_flight(self, trial_id:int, direction:str, flight_time:float):
+        """Adds a completed flight to the aggregates
+
+        Args:
+            trial_id (int): The id number of the trial the flight was made in
+            direction (str): The exit gate, "left" or "right"
+            flight_time (float): Seconds between the entrance and exit gate crossings
+        """
+        self.flights_per_trial[trial_id] = self.flights_per_trial.get(trial_id, 0) + 1
+        self.choices[direction] = self.choices.get(direction, 0) + 1
+        self.flight_count += 1
+        self.flight_time_total += flight_time
+
+    def obstacle_changed(self):
+        """Restarts the count of events since the obstacle was last rotated
+        """
+        self.events_since_obstacle_change = 0
+
+    def summary_text(self) -> str:
+        """Formats the aggregates for the pause screen overlay
+        """
+
+        if not self.flight_count:
+            return "No flights recorded this session\nEvents since obstacle change: {}".format(
+                self.events_since_obstacle_change
+            )
+
+        return "\n".join([
+            "Flights: {flights}    Mean flight time: {mean:.2f} s".format(
+                flights=self.flight_count,
+                mean=self.flight_time_total/self.flight_count
+            ),
+            "Left: {left}    Right: {right}    ({percent:.0f}% left)".format(
+                left=self.choices["left"],
+                right=self.choices["right"],
+                percent=100*self.choices["left"]/self.flight_count
+            ),
+            "Per trial: " + "    ".join(
+                "{}: {}".format(trial_id, count) for trial_id, count in sorted(self.flights_per_trial.items())
+            ),
+            "Events since obstacle change: {}".format(self.events_since_obstacle_change)
+        ])
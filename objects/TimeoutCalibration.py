@@ -0,0 +1,159 @@
+from bisect import bisect_left
+from statistics import NormalDist, fmean, stdev
+import math
+
+import logging
+logger = logging.getLogger(__name__)
+
+from objects.DataReader import EXIT_GATES
+
+
+class TimeoutCalibration:
+    """Collects the gaps between gate crossings and estimates the effect of a reset timeout on the recorded flights
+    """
+
+    def __init__(self, max_interval:float=10, bounce_interval:float=0.05):
+        """Starts with no intervals
+
+        Args:
+            max_interval (float, optional): Gaps longer than this many seconds are not part of the same flight or bird spacing. Defaults to 10.
+            bounce_interval (float, optional): Exit to exit gaps shorter than this many seconds are sensor bounce of one bird. Defaults to 0.05.
+        """
+
+        self.max_interval = max_interval
+        self.bounce_interval = bounce_interval
+
+        # Seconds between crossings. Only the intervals are kept so memory grows with flights, not rows
+        self.entrance_exit = [] # Entrance to the first exit after it, the flight time of entrance first flights
+        self.exit_entrance = [] # Exit to the first entrance after it, the flight time of exit first flights
+        self.exit_exit = [] # Consecutive exits without bounce, the spacing of birds leaving the tunnel
+        self.exit_pair_count = 0 # All consecutive exits without bounce, including gaps over the max_interval
+
+        self.sorted = True
+
+    def add_events(self, events):
+        """Streams the gate events of one data file into the interval lists
+
+        Args:
+            events (iterable): GateEvents in time order
+        """
+
+        # The gate that opened the current flight and when, None once the flight is completed or expired.
+        # Each crossing only completes one flight, so the gap to the next bird is never counted as a flight time
+        open_gate = None
+        open_time = None
+        last_exit = None
+
+        for event in events:
+            if open_gate is not None and event.epoch_time - open_time > self.max_interval:
+                open_gate = None
+
+            if event.gate_id == "entrance":
+                if open_gate == "exit":
+                    self.add_interval(self.exit_entrance, event.epoch_time - open_time)
+                    open_gate = None
+                else:
+                    # A repeated entrance restarts the flight, as the controller restarts the entrance timeout
+                    open_gate = "entrance"
+                    open_time = event.epoch_time
+            elif event.gate_id in EXIT_GATES:
+                bounced = last_exit is not None and event.epoch_time - last_exit < self.bounce_interval
+                if last_exit is not None and not bounced:
+                    self.exit_pair_count += 1
+                    self.add_interval(self.exit_exit, event.epoch_time - last_exit)
+                last_exit = event.epoch_time
+
+                # Bounce of the exit that just completed or opened a flight is not a new crossing
+                if bounced:
+                    continue
+                if open_gate == "entrance":
+                    self.add_interval(self.entrance_exit, event.epoch_time - open_time)
+                    open_gate = None
+                else:
+                    open_gate = "exit"
+                    open_time = event.epoch_time
+
+        self.sorted = False
+
+    def add_interval(self, intervals:list, interval:float):
+        """Stores an interval if it is in the range that can belong to a flight
+
+        Args:
+            intervals (list): The interval list to add to
+            interval (float): Seconds between the crossings
+        """
+        if 0 < interval <= self.max_interval:
+            intervals.append(interval)
+
+    def sort(self):
+        """Sorts the intervals so the rates can be looked up with bisection
+        """
+        if not self.sorted:
+            self.entrance_exit.sort()
+            self.exit_entrance.sort()
+            self.exit_exit.sort()
+            self.sorted = True
+
+    @staticmethod
+    def fit(intervals:list) -> NormalDist:
+        """Fits a log-normal distribution to the intervals
+
+        Args:
+            intervals (list): Seconds between crossings, at least two values
+
+        Returns:
+            NormalDist: The distribution of the natural log of the intervals
+        """
+        logs = [math.log(interval) for interval in intervals]
+        return NormalDist(fmean(logs), stdev(logs))
+
+    def rates(self, flight_fit:NormalDist, timeout:float) -> tuple:
+        """Estimates the share of flights lost and merged by a timeout
+
+        Args:
+            flight_fit (NormalDist): Log-normal fit of the flight times paired by the gate the timeout applies to
+            timeout (float): The timeout in seconds
+
+        Returns:
+            tuple: (false reset rate, merged flight rate). False resets are flights slower than the timeout,
+            merges are birds following each other within the timeout
+        """
+
+        self.sort()
+        false_resets = 1 - flight_fit.cdf(math.log(timeout))
+        merged = bisect_left(self.exit_exit, timeout) / self.exit_pair_count if self.exit_pair_count else 0.0
+
+        return false_resets, merged
+
+    def recommend(self, flight_times:list, target:float=0.01, step:float=0.05) -> dict:
+        """Finds the shortest timeout keeping false resets under the target. If the merged rate is then
+        over the target no timeout meets both, so the timeout with the lowest combined rate is used
+
+        Args:
+            flight_times (list): Flight times paired by the gate the timeout applies to
+            target (float, optional): Acceptable rate of false resets and merged flights. Defaults to 0.01.
+            step (float, optional): Resolution of the timeouts tried in seconds. Defaults to 0.05.
+
+        Returns:
+            dict: timeout (s), false_reset_rate and merged_rate, or None with fewer than 20 flight times
+        """
+
+        if len(flight_times) < 20:
+            return None
+
+        flight_fit = self.fit(flight_times)
+
+        # False resets only fall and merges only rise as the timeout gets longer
+        evaluated = []
+        for multiple in range(1, int(self.max_interval / step) + 1):
+            timeout = step * multiple
+            false_resets, merged = self.rates(flight_fit, timeout)
+            evaluated.append((timeout, false_resets, merged))
+            if false_resets <= target:
+                break
+
+        timeout, false_resets, merged = evaluated[-1]
+        if false_resets > target or merged > target:
+            timeout, false_resets, merged = min(evaluated, key=lambda rates: rates[1] + rates[2])
+
+        return {"timeout": timeout, "false_reset_rate": false_resets, "merged_rate": merged}
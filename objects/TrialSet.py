@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from pathlib import Path
+import json
+import csv
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+# The keys every experimental trial must have
+TRIAL_KEYS = ("trial_id", "left_bg", "right_bg", "left_fg", "right_fg")
+
+# Obstacle positions used when the trial file does not list them (CSV files only hold trials)
+DEFAULT_OBSTACLES = (
+    {"left_fg": "white", "right_fg": "white"},
+    {"left_fg": "black", "right_fg": "black"},
+    {"left_fg": "white", "right_fg": "black"},
+    {"left_fg": "black", "right_fg": "white"}
+)
+
+
+class TrialDefinitionError(ValueError):
+    """Raised when a trial definition file can not be read or does not describe a valid experiment
+    """
+
+
+def obstacle_key(obstacle:dict) -> tuple:
+    """Converts an obstacle or trial to a hashable key of its foreground colours
+
+    Args:
+        obstacle (dict): A dictionary with left_fg and right_fg keys
+    """
+    return (str(obstacle["left_fg"]).lower(), str(obstacle["right_fg"]).lower())
+
+
+@dataclass(frozen=True)
+class TrialSet:
+    """A validated set of experimental trials, compiled into lookup tables by obstacle position
+    """
+
+    trials: dict # trial_id: trial
+    valid_obstacles: tuple
+    trials_by_obstacle: dict # obstacle_key: tuple of trials
+    source: Path = None
+
+    @classmethod
+    def compile(cls, trials:list, obstacles:list, source:Path=None) -> "TrialSet":
+        """Validates the trials and obstacles in a single pass and builds the lookup tables
+
+        Args:
+            trials (list): List of trial dictionaries with the TRIAL_KEYS
+            obstacles (list): List of valid obstacle dictionaries with left_fg and right_fg keys
+            source (Path, optional): File the definitions were loaded from, used in messages. Defaults to None.
+
+        Raises:
+            TrialDefinitionError: If the trials or obstacles are not valid
+        """
+
+        trial_keys = frozenset(TRIAL_KEYS)
+
+        valid_obstacles = []
+        trials_by_obstacle = {}
+        for obstacle in obstacles:
+            try:
+                key = obstacle_key(obstacle)
+            except (KeyError, TypeError):
+                raise TrialDefinitionError("Obstacle {} does not have left_fg and right_fg".format(obstacle)) from None
+            if key not in trials_by_obstacle:
+                trials_by_obstacle[key] = []
+                valid_obstacles.append({"left_fg": obstacle["left_fg"], "right_fg": obstacle["right_fg"]})
+
+        compiled_trials = {}
+        for trial in trials:
+            if not isinstance(trial, dict) or trial.keys() != trial_keys:
+                raise TrialDefinitionError(
+                    "Trial {} keys do not match the experiment blank {}".format(trial, list(TRIAL_KEYS))
+                )
+            if not isinstance(trial["trial_id"], int) or isinstance(trial["trial_id"], bool):
+                raise TrialDefinitionError("Trial id {!r} is not an integer".format(trial["trial_id"]))
+            if trial["trial_id"] in compiled_trials:
+                raise TrialDefinitionError("Trial {} is defined more than once".format(trial["trial_id"]))
+
+            valid_trials = trials_by_obstacle.get(obstacle_key(trial))
+            if valid_trials is None:
+                raise TrialDefinitionError(
+                    "Trial {} keys do not match any valid obstacle state".format(trial["trial_id"])
+                )
+
+            # Ordered as the experiment blank so the logs stay consistent
+            trial = {key: trial[key] for key in TRIAL_KEYS}
+            compiled_trials[trial["trial_id"]] = trial
+            valid_trials.append(trial)
+
+        if not compiled_trials:
+            raise TrialDefinitionError("No experimental trials defined")
+
+        # Every obstacle position must lead to a trial or the experiment stalls after rotation
+        for key, valid_trials in trials_by_obstacle.items():
+            if not valid_trials:
+                raise TrialDefinitionError("Obstacle {} has no experimental trials".format(key))
+
+        return cls(
+            trials=compiled_trials,
+            valid_obstacles=tuple(valid_obstacles),
+            trials_by_obstacle={key: tuple(value) for key, value in trials_by_obstacle.items()},
+            source=source
+        )
+
+    def valid_trials(self, obstacle:dict) -> tuple:
+        """Returns the trials that can be run with the given obstacle position
+
+        Args:
+            obstacle (dict): A dictionary with left_fg and right_fg keys
+        """
+        return self.trials_by_obstacle.get(obstacle_key(obstacle), ())
+
+
+def load_trial_set(trials_path:Path) -> TrialSet:
+    """Reads and compiles a trial definition file. TOML and JSON files hold "trials" and "obstacles" lists,
+    CSV files hold one trial per row and use the default obstacles
+
+    Args:
+        trials_path (Path): Location of the .toml, .json or .csv trial definition file
+
+    Raises:
+        TrialDefinitionError: If the file can not be read or the definitions are not valid
+    """
+
+    trials_path = Path(trials_path)
+    try:
+        match trials_path.suffix.lower():
+            case ".toml":
+                import tomllib
+                with trials_path.open("rb") as trials_file:
+                    definitions = tomllib.load(trials_file)
+            case ".json":
+                with trials_path.open() as trials_file:
+                    definitions = json.load(trials_file)
+            case ".csv":
+                with trials_path.open(newline="") as trials_file:
+                    trials = list(csv.DictReader(trials_file))
+                for trial in trials:
+                    trial["trial_id"] = int(trial["trial_id"])
+                definitions = {"trials": trials}
+            case _:
+                raise TrialDefinitionError("Trial file type {} is not supported".format(trials_path.suffix))
+    except (OSError, ValueError, KeyError, TypeError) as error:
+        # Decode errors from all three formats are ValueErrors, missing csv cells are TypeErrors
+        if isinstance(error, TrialDefinitionError): raise
+        raise TrialDefinitionError("Could not read trial file {}: {}".format(trials_path, error)) from error
+
+    if not isinstance(definitions, dict):
+        raise TrialDefinitionError("Trial file {} must contain a trials list".format(trials_path))
+
+    trials = definitions.get("trials", [])
+    obstacles = definitions.get("obstacles", DEFAULT_OBSTACLES)
+    if not isinstance(trials, list) or not isinstance(obstacles, (list, tuple)):
+        raise TrialDefinitionError("Trial file {} trials and obstacles must be lists".format(trials_path))
+
+    return TrialSet.compile(trials, obstacles, source=trials_path)
@@ -0,0 +1,134 @@
+"""
+Title: MBiol Project Data Quality Scanner
+Author: Ambrose Hlustik-Smith
+Description: Flags recording anomalies in the day data files, skipping files unchanged since the last scan
+"""
+# Generic libraries
+# =================
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import os
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Custom objects
+# ==============
+from objects.Config import ConfigError, load_config
+from objects.DataQuality import scan_file
+from objects.DataReader import data_files
+from objects.TrialSet import TrialDefinitionError, load_trial_set
+
+
+def parse_args():
+    """Reads the command line options
+    """
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", type=Path, nargs="*", help="Data files to scan (default every csv file in the data path)")
+    parser.add_argument("--data-path", type=Path, default=None, help="Folder of DataWriter csv files (default data_path from the .env file)")
+    parser.add_argument("--trials-path", type=Path, default=None, help="Trial definition file (default trials_path from the .env file)")
+    parser.add_argument("--env", type=Path, default=Path(".env"), help="The .env file the default paths and timeouts are read from (default .env)")
+    parser.add_argument("--cache", type=Path, default=None, help="Report cache file (default qa_cache.json in the data path)")
+    parser.add_argument("--crossing-timeout", type=int, default=None, help="Entrance gate timeout in ms used to pair crossings (default the controller's entrance timeout)")
+    parser.add_argument("--exit-timeout", type=int, default=None, help="Exit gate timeout in ms (default the controller's exit timeout)")
+    parser.add_argument("--bounce-ms", type=float, default=50, help="Crossings of one gate closer than this are bounce (default 50)")
+    parser.add_argument("--bounce-burst", type=int, default=3, help="Bouncing crossings in a row reported as a burst (default 3)")
+    parser.add_argument("--rotation-chance", type=float, default=1e-6, help="Runs in one trial less likely than this under random rotation are reported (default 1e-6)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes (default all cores)")
+    parser.add_argument("--rows", action="store_true", help="Lists the rows of each anomaly")
+
+    return parser.parse_args()
+
+
+def main():
+    """Scans the changed files in a process pool and prints the report of every file
+    """
+
+    args = parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    # Flights are paired with the controller's timeouts unless they are given, without a .env the defaults are used
+    try:
+        config = load_config(args.env)
+    except ConfigError as config_error:
+        logging.warning("Current config not used: {}".format(config_error))
+        config = None
+
+    data_path = args.data_path or (config.data_path if config else Path("data"))
+    trials_path = args.trials_path or (config.trials_path if config else Path("trials.toml"))
+    entrance_ms = args.crossing_timeout or (config.entrance_timeout if config else 1500)
+    exit_ms = args.exit_timeout or (config.exit_timeout if config else entrance_ms)
+
+    # The chance of a trial repeating depends on how many trials share its obstacle
+    try:
+        trial_set = load_trial_set(trials_path)
+        trial_choices = sorted(
+            [trial_id, len(trial_set.valid_trials(trial))] for trial_id, trial in trial_set.trials.items()
+        )
+    except TrialDefinitionError as trial_error:
+        logging.warning("Trial rotation not checked: {}".format(trial_error))
+        trial_choices = []
+
+    files = args.files or data_files(data_path)
+    cache_path = args.cache or data_path / "qa_cache.json"
+
+    # Reports are reused while the file and the scan options are unchanged
+    options = [entrance_ms / 1000, exit_ms / 1000, args.bounce_ms / 1000, args.bounce_burst, args.rotation_chance, trial_choices]
+    try:
+        cache = json.loads(cache_path.read_text())
+        if cache.get("options") != options:
+            cache = {"options": options, "files": {}}
+    except (OSError, ValueError):
+        cache = {"options": options, "files": {}}
+
+    stale = []
+    for data_file in files:
+        stat = data_file.stat()
+        report = cache["files"].get(str(data_file.resolve()))
+        if report is None or report["size"] != stat.st_size or report["mtime_ns"] != stat.st_mtime_ns:
+            stale.append(data_file)
+
+    logging.info("{stale} of {total} files changed since the last scan".format(stale=len(stale), total=len(files)))
+
+    if stale:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            # One file per task
+            reports = pool.map(scan_file, stale, *[[option]*len(stale) for option in options])
+            for data_file, report in zip(stale, reports):
+                cache["files"][str(data_file.resolve())] = report
+
+        # Written to a temporary file first so an interrupted run does not lose the cache
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(cache_path.name + ".tmp")
+        temp_path.write_text(json.dumps(cache, separators=(",", ":")))
+        os.replace(temp_path, cache_path)
+
+    # Report
+    # ======
+    flagged = 0
+    for data_file in files:
+        report = cache["files"][str(data_file.resolve())]
+        if not report["counts"]:
+            print("{}: {} rows, ok".format(data_file.name, report["rows"]))
+            continue
+
+        flagged += 1
+        print("{}: {} rows, {}".format(
+            data_file.name,
+            report["rows"],
+            ", ".join("{} {}".format(count, anomaly) for anomaly, count in sorted(report["counts"].items()))
+        ))
+        if args.rows:
+            for anomaly, rows in sorted(report["anomalies"].items()):
+                more = report["counts"][anomaly] - len(rows)
+                print("    {}: rows {}{}".format(anomaly, ", ".join(map(str, rows)), " and {} more".format(more) if more else ""))
+
+    logging.info("{flagged} of {total} files have anomalies".format(flagged=flagged, total=len(files)))
+
+
+if __name__ == "__main__":
+    main()
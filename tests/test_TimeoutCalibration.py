@@ -0,0 +1,33 @@
+from objects.DataReader import GateEvent
+from objects.TimeoutCalibration import TimeoutCalibration
+
+
+def events(crossings):
+    """Builds gate events from (gate_id, epoch_time) pairs"""
+    return [GateEvent(row, gate_id, epoch_time, 1) for row, (gate_id, epoch_time) in enumerate(crossings, start=2)]
+
+
+def test_exit_first_flights():
+    calibration = TimeoutCalibration()
+    calibration.add_events(events([
+        ("left", 0.0), ("entrance", 0.8),
+        ("right", 5.0), ("entrance", 6.0),
+        ("left", 10.0), ("entrance", 10.5)
+    ]))
+
+    assert calibration.exit_entrance == [0.8, 1.0, 0.5]
+    assert calibration.entrance_exit == []
+
+
+def test_mixed_flights_pair_each_crossing_once():
+    calibration = TimeoutCalibration()
+    calibration.add_events(events([
+        ("entrance", 0.0), ("left", 1.0),
+        ("right", 3.0), ("entrance", 4.0), # Exit first flight after an entrance first flight
+        ("left", 6.0), ("left", 6.01), ("entrance", 7.0), # Exit bounce is not a second crossing
+        ("entrance", 9.0), ("right", 10.2)
+    ]))
+
+    assert [round(interval, 6) for interval in calibration.entrance_exit] == [1.0, 1.2]
+    assert [round(interval, 6) for interval in calibration.exit_entrance] == [1.0, 1.0]
+    assert calibration.exit_pair_count == 3